@@ -1,194 +1,240 @@
+import logging
 from datetime import datetime
 from flask import send_from_directory
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, current_app, g, jsonify, request, stream_with_context
 from configs.database import db
 from configs.config import Config
-from services.getTracketsProject import getDataProject
+from services.importProject import importFromRedmine, importFromSnapshot, InvalidProjectData, ProjectsImportFailed
+from services.importJobs import failStaleJobs, submitImportJob, serializeJob, ImportQueueFull, UNFINISHED_PHASES
+from services.responseFormat import compactResult, jsonResponse
+from services.metrics import finishMetrics, instrumentEngine, renderMetrics, startMetrics
+from services.responseSummary import getProjectProgress, getProjectsProgress, rebuildSummary
+from services.projectTree import getProjectTree
+from services.responseExport import iterResponsesCsv
+from services.responseAnswers import applyAnswers, InvalidAnswers
+import click
+from flask.cli import with_appcontext
 from flask_migrate import Migrate
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import SQLAlchemyError
 from configs.models import (
     Project,
-    Device,
-    Worker,
-    Subtracker,
-    DeviceSubtracker,
-    Response,
-    Question  
+    ImportJob
 )
 from flask_cors import CORS
 
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1"]}})
-db.init_app(app)
-
-migrate = Migrate(app, db)
-
-
-@app.route('/issues.json')
+api = Blueprint('api', __name__)
+migrate = Migrate()
+logger = logging.getLogger(__name__)
+
+
+def create_app(config_object=Config):
+    # Factoría de la aplicación: un único engine (el de Flask-SQLAlchemy) por proceso
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1"]}})
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+    db.init_app(app)
+    migrate.init_app(app, db)
+    app.register_blueprint(api)
+    app.before_request(start_request_metrics)
+    app.teardown_request(finish_request_metrics)
+    app.teardown_appcontext(shutdown_session)
+    app.cli.add_command(rebuild_summary)
+    with app.app_context():
+        instrumentEngine(db.engine)
+        try:
+            failStaleJobs()
+        except SQLAlchemyError:
+            # Base de datos sin migrar todavía (p. ej. antes de db.create_all() en desarrollo)
+            db.session.rollback()
+            logger.warning("No se pudieron revisar los trabajos de importación pendientes")
+    return app
+
+
+@click.command('rebuild-summary')
+@click.option('--project-id', type=int, default=None, help='Solo este proyecto (por defecto todos)')
+@with_appcontext
+def rebuild_summary(project_id):
+    # Reparación del resumen de progreso: flask --app wsgi rebuild-summary [--project-id N]
+    rebuildSummary(project_id)
+    click.echo(f"Resumen recalculado para {'el proyecto ' + str(project_id) if project_id else 'todos los proyectos'}")
+
+
+def start_request_metrics():
+    if request.endpoint != 'api.metrics':
+        g.metrics, g.metrics_token = startMetrics(request.endpoint)
+
+def finish_request_metrics(exception=None):
+    if 'metrics' in g:
+        finishMetrics(g.metrics, g.metrics_token)
+
+
+@api.route('/issues.json')
 def get_issues():
     return send_from_directory('', 'salida.json')
 
-@app.teardown_appcontext
 def shutdown_session(exception=None):
     db.session.remove()
 
-@app.route("/ping")
+@api.route("/ping")
 def testping():
     return "pong"
 
-@app.route('/data', methods=['POST'])
+@api.route('/data', methods=['POST'])
 def handle_data():
     data = request.get_json()
     url, user, password = data.get('url'), data.get('user'), data.get('pass')
+    incremental = bool(data.get('incremental', False))
+    redmine_project_id = data.get('project_id')  # Id o identificador del proyecto en Redmine (opcional)
+    asynchronous = bool(data.get('async', False))
+    save_snapshot = bool(data.get('save_snapshot', False))  # Guarda las páginas descargadas para repetir la importación
+    force = bool(data.get('force', False))  # Escribe también los trackers sin cambios desde la última importación
+    refresh = bool(data.get('refresh', False))  # Descarga de nuevo aunque haya un resultado reciente en caché
 
     if not url or not user or not password:
         return jsonify({'success': False, 'message': 'Faltan datos en el formulario'}), 400
 
+    if asynchronous:
+        # La importación se ejecuta en segundo plano; el progreso se consulta en /jobs/<id>
+        try:
+            job_id = submitImportJob(
+                current_app._get_current_object(), url, user, password, incremental, redmine_project_id,
+                save_snapshot=save_snapshot, force=force, refresh=refresh
+            )
+        except ImportQueueFull as e:
+            return jsonify({'success': False, 'message': str(e)}), 503
+        return jsonify({'success': True, 'job_id': job_id, 'status_url': f'/jobs/{job_id}'}), 202
+
     try:
-        project_data = getDataProject(url, user, password)
-        if not project_data or not isinstance(project_data, list):
-            return jsonify({'success': False, 'message': 'Datos del proyecto no válidos'}), 400
-
-        project_name = project_data[0].get('project_name')
-        worker_name = project_data[0].get('worker_name')
-        trackers = project_data[0].get('trackers', [])
-
-        if not project_name or not worker_name:
-            raise ValueError("Faltan datos obligatorios: project_name o worker_name")
-
-        project_id = insert_project(project_name)
-        worker_id = insert_worker(worker_name)
-        tracker_results = []
-
-        for tracker in trackers:
-            tracker_name = tracker.get('tracker_name')
-            subjects = tracker.get('subjects', [])
-            device = Device.query.filter_by(name=tracker_name).first()
-            if not device:
-                continue
-
-            device_id = device.id
-            tracker_info = {'tracker_name': tracker_name, 'subjects': []}
-
-            for subject in subjects:
-                subtracker_id = insert_subtracker(project_id, subject)
-                insert_device_subtracker(device_id, subtracker_id)
-                
-                questions = get_questions_for_subtracker_and_device(subtracker_id, device_id)
-
-                # Inserta o actualiza respuestas
-                for question_block in questions.get('subjects', []):
-                    for question in question_block['questions']:
-                        question_id = question['id']
-                        insert_response(
-                            subtracker_id=subtracker_id,
-                            device_id=device_id,
-                            question_id=question_id,
-                            project_id=project_id,
-                            worker_id=worker_id
-                        )
-
-                tracker_info['subjects'].append({'subject': subject, 'questions': questions})
-
-            tracker_results.append(tracker_info)
-
-        return jsonify({'success': True, 'project_name': project_name, 'trackers': tracker_results, 'worker_name': worker_name})
-
-    except IntegrityError as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'message': f'Error de integridad: {str(e.orig)}'}), 500
+        result = importFromRedmine(
+            url, user, password, incremental, redmine_project_id,
+            save_snapshot=save_snapshot, force=force, refresh=refresh
+        )
+        if request.args.get('format') == 'compact':
+            result = compactResult(result)
+
+        return jsonResponse({'success': True, **result})
+
+    except InvalidProjectData as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    except ProjectsImportFailed as e:
+        return jsonify({'success': False, 'message': f'Error al procesar los datos: {str(e)}', 'projects': e.summaries}), 500
 
     except Exception as e:
-        print(f"Error en handle_data: {str(e)}")
+        logger.exception("Error en handle_data")
         return jsonify({'success': False, 'message': f'Error al procesar los datos: {str(e)}'}), 500
-    
 
 
-def insert_response(subtracker_id, device_id, question_id, project_id, worker_id, response_text=None, status='pending', comments=None):
+@api.route('/responses/batch', methods=['POST'])
+def submit_answers():
+    # Cada elemento: {'id', 'version', 'response_text'?, 'status'?, 'comments'?, 'responsable'?}
+    data = request.get_json(silent=True) or {}
     try:
-        existing_response = Response.query.filter_by(
-            subtracker_id=subtracker_id,
-            device_id=device_id,
-            question_id=question_id,
-            project_id=project_id,
-            worker_id=worker_id
-        ).first()
-
-        if existing_response:
-            existing_response.response_text = response_text
-            existing_response.status = status
-            existing_response.comments = comments
-            print(f"Actualizando respuesta existente: {existing_response.id}")
-        else:
-            new_response = Response(
-                subtracker_id=subtracker_id,
-                device_id=device_id,
-                question_id=question_id,
-                project_id=project_id,
-                worker_id=worker_id,
-                response_text=response_text,
-                status=status,
-                comments=comments
-            )
-            db.session.add(new_response)
-            print(f"Insertando nueva respuesta para question_id={question_id}")
+        results = applyAnswers(data.get('answers'), data.get('responsable'))
+    except InvalidAnswers as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error en submit_answers")
+        return jsonify({'success': False, 'message': f'Error al guardar las respuestas: {str(e)}'}), 500
+
+    updated = sum(1 for result in results if result['result'] == 'updated')
+    return jsonify({'success': updated == len(results), 'updated': updated, 'results': results})
+
+
+@api.route('/projects/progress', methods=['GET'])
+def get_projects_progress():
+    return jsonResponse({'success': True, 'projects': getProjectsProgress()})
+
+
+@api.route('/projects/<int:project_id>/progress', methods=['GET'])
+def get_project_progress(project_id):
+    # ?by=device,worker limita los desgloses devueltos
+    breakdowns = request.args.get('by', 'device,subtracker,worker').split(',')
+    return jsonResponse({'success': True, **getProjectProgress(project_id, breakdowns)})
+
+
+@api.route('/projects/<int:project_id>/tree', methods=['GET'])
+def get_project_tree(project_id):
+    # ?after=<id del último subtracker recibido>&limit=N&worker_id=N
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', type=int)
+    worker_id = request.args.get('worker_id', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'success': False, 'message': 'limit debe ser mayor que 0'}), 400
+
+    tree = getProjectTree(project_id, after, limit, worker_id)
+    if tree is None:
+        return jsonify({'success': False, 'message': 'Proyecto no encontrado'}), 404
+    return jsonResponse({'success': True, **tree})
 
-        db.session.commit()
 
-    except IntegrityError as e:
-        db.session.rollback()
-        print(f"Error de integridad al insertar respuesta: {str(e.orig)}")
-        raise
+@api.route('/projects/<int:project_id>/responses.csv', methods=['GET'])
+def export_project_responses(project_id):
+    # CSV en streaming (chunked): ?worker_id=N limita la exportación a un trabajador
+    project = db.session.get(Project, project_id)
+    if project is None:
+        return jsonify({'success': False, 'message': 'Proyecto no encontrado'}), 404
+
+    worker_id = request.args.get('worker_id', type=int)
+    response = current_app.response_class(
+        stream_with_context(iterResponsesCsv(project_id, worker_id)),
+        mimetype='text/csv'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="project_{project_id}_responses.csv"'
+    return response
+
+
+@api.route('/metrics')
+def metrics():
+    body, content_type = renderMetrics()
+    return current_app.response_class(body, content_type=content_type)
+
+
+@api.route('/data/snapshot', methods=['POST'])
+def handle_snapshot():
+    # Repite una importación desde un snapshot de SNAPSHOT_DIR, sin llamar a Redmine
+    data = request.get_json(silent=True) or {}
+    snapshot, user = data.get('snapshot'), data.get('user')
+
+    if not snapshot or not user:
+        return jsonify({'success': False, 'message': 'Faltan datos en el formulario'}), 400
+
+    try:
+        result = importFromSnapshot(snapshot, user)
+        if request.args.get('format') == 'compact':
+            result = compactResult(result)
+
+        return jsonResponse({'success': True, **result})
+
+    except InvalidProjectData as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    except ProjectsImportFailed as e:
+        return jsonify({'success': False, 'message': f'Error al procesar los datos: {str(e)}', 'projects': e.summaries}), 500
+
     except Exception as e:
-        db.session.rollback()
-        print(f"Error al insertar respuesta: {str(e)}")
-        raise
-
-def get_questions_for_subtracker_and_device(subtracker_id, device_id):
-    subtracker = db.session.get(Subtracker, subtracker_id)
-    device = db.session.get(Device, device_id)
-
-    result = {'tracker_name': subtracker.name, 'subjects': []}
-    for question_block in device.question_blocks:
-        questions = [{'id': q.id, 'question_text': q.question_text, 'expected_result': q.expected_result} for q in question_block.questions]
-        if questions:
-            result['subjects'].append({'question_block': question_block.name, 'questions': questions})
-    return result
-
-def insert_worker(worker_name):
-    worker = Worker.query.filter_by(name=worker_name).first()
-    if worker: 
-        return worker.id
-    new_worker = Worker(name=worker_name)
-    db.session.add(new_worker)
-    db.session.commit()
-    return new_worker.id
-
-def insert_device_subtracker(device_id, subtracker_id):
-    if not DeviceSubtracker.query.filter_by(device_id=device_id, subtracker_id=subtracker_id).first():
-        db.session.add(DeviceSubtracker(device_id=device_id, subtracker_id=subtracker_id))
-        db.session.commit()
-
-def insert_project(project_name):
-    project = Project.query.filter_by(name=project_name).first()
-    if project: 
-        return project.id
-    new_project = Project(name=project_name)
-    db.session.add(new_project)
-    db.session.commit()
-    return new_project.id
-
-def insert_subtracker(project_id, subject):
-    subtracker = Subtracker.query.filter_by(name=subject).first()
-    if subtracker: 
-        return subtracker.id
-    new_subtracker = Subtracker(name=subject, project_id=project_id)
-    db.session.add(new_subtracker)
-    db.session.commit()
-    return new_subtracker.id
+        logger.exception("Error en handle_snapshot")
+        return jsonify({'success': False, 'message': f'Error al procesar los datos: {str(e)}'}), 500
+
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(ImportJob, job_id)
+    if job and job.phase in UNFINISHED_PHASES and failStaleJobs(job_id):
+        db.session.refresh(job)
+    if not job:
+        return jsonify({'success': False, 'message': 'Trabajo no encontrado'}), 404
+    include_result = request.args.get('include') == 'result'
+    payload = serializeJob(job, include_result)
+    if include_result and payload['result'] and request.args.get('format') == 'compact':
+        payload['result'] = compactResult(payload['result'])
+    return jsonResponse({'success': True, **payload})
+    
+
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context(): 
         db.create_all()
     app.run(host='0.0.0.0', port=7575, debug=True)
\ No newline at end of file
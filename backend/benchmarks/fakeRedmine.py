@@ -0,0 +1,134 @@
+import argparse
+import copy
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Redmine local de pruebas: sirve /issues.json y /trackers.json con la misma semántica
+# de limit/offset/total_count y los filtros que usa getDataProject (tracker_id,
+# project_id, status_id, updated_on). Las issues se generan a partir de salida.json.
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'salida.json')
+MAX_LIMIT = 100  # Redmine no devuelve más de 100 issues por página
+BASE_DATE = datetime(2024, 1, 1)
+
+
+def generateIssues(count, projects=1, subjects_ratio=0.5, sample_file=SAMPLE_FILE):
+    # Genera `count` issues con la forma de salida.json (descripciones y custom_fields
+    # reales). subjects_ratio controla cuántos subjects distintos hay por tracker.
+    with open(sample_file, 'r') as file:
+        templates = json.load(file)['issues']
+
+    distinct_subjects = max(1, int(count * subjects_ratio))
+    issues = []
+    for i in range(count):
+        issue = copy.deepcopy(templates[i % len(templates)])
+        project_number = i % projects
+        issue['id'] = 100000 + i
+        issue['project'] = {
+            'id': issue['project']['id'] + project_number,
+            'name': issue['project']['name'] if project_number == 0 else f"{issue['project']['name']} {project_number}"
+        }
+        issue['subject'] = f"{issue['subject']} #{i % distinct_subjects}"
+        issue['updated_on'] = (BASE_DATE + timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        issues.append(issue)
+    return issues
+
+
+def trackersOf(issues):
+    trackers = {issue['tracker']['id']: issue['tracker'] for issue in issues}
+    return [trackers[tracker_id] for tracker_id in sorted(trackers)]
+
+
+class FakeRedmineHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como un Redmine real detrás de nginx
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+        if parsed.path == '/trackers.json':
+            self._send({'trackers': server.trackers})
+        elif parsed.path == '/projects.json':
+            self._send({'projects': server.projects, 'total_count': len(server.projects), 'offset': 0, 'limit': len(server.projects)})
+        elif parsed.path == '/issues.json':
+            with server.stats_lock:
+                server.stats['pages'] += 1
+            issues = server.filterIssues(params)
+            limit = min(int(params.get('limit', 25)), MAX_LIMIT)
+            offset = int(params.get('offset', 0))
+            page = issues[offset:offset + limit]
+            with server.stats_lock:
+                server.stats['issues'] += len(page)
+            self._send({'issues': page, 'total_count': len(issues), 'offset': offset, 'limit': limit})
+        elif parsed.path == '/_stats':
+            with server.stats_lock:
+                self._send(dict(server.stats))
+        elif parsed.path == '/_reset':
+            with server.stats_lock:
+                server.stats.update(pages=0, issues=0)
+            self._send({'ok': True})
+        else:
+            self._send({'errors': ['Not found']}, 404)
+
+
+class FakeRedmineServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, issues):
+        super().__init__(address, FakeRedmineHandler)
+        self.issues = issues
+        self.trackers = trackersOf(issues)
+        self.projects = sorted({issue['project']['id']: issue['project'] for issue in issues}.values(), key=lambda p: p['id'])
+        self.stats = {'pages': 0, 'issues': 0}
+        self.stats_lock = threading.Lock()
+        self._filter_cache = {}
+
+    def filterIssues(self, params):
+        key = (params.get('tracker_id'), params.get('project_id'), params.get('status_id'), params.get('updated_on'))
+        if key not in self._filter_cache:
+            issues = self.issues
+            if key[0]:
+                tracker_ids = {int(value) for value in key[0].split('|')}
+                issues = [issue for issue in issues if issue['tracker']['id'] in tracker_ids]
+            if key[1]:
+                issues = [issue for issue in issues if str(issue['project']['id']) == key[1]]
+            if key[2] != '*':
+                issues = [issue for issue in issues if not issue['status'].get('is_closed')]
+            if key[3]:
+                since = key[3].lstrip('>=')
+                issues = [issue for issue in issues if issue['updated_on'] >= since]
+            self._filter_cache[key] = issues
+        return self._filter_cache[key]
+
+
+def serve(count, port=0, projects=1, ready=None):
+    # ready: multiprocessing.Queue opcional donde se publica el puerto elegido
+    server = FakeRedmineServer(('127.0.0.1', port), generateIssues(count, projects))
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Redmine falso para benchmarks')
+    parser.add_argument('--issues', type=int, default=1000)
+    parser.add_argument('--projects', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8088)
+    args = parser.parse_args()
+    print(f"Sirviendo {args.issues} issues en http://127.0.0.1:{args.port}")
+    serve(args.issues, args.port, args.projects)
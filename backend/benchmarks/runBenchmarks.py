@@ -0,0 +1,205 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from urllib.request import urlopen
+
+# Permite ejecutar el script desde backend/ con: python benchmarks/runBenchmarks.py
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event
+
+from app import create_app
+from benchmarks.fakeRedmine import generateIssues, serve, trackersOf
+from configs.config import Config
+from configs.database import db
+from configs.models import Device, DeviceQuestionBlock, Question, QuestionBlock
+from services.getTracketsProject import getDataProject
+
+# Benchmark de extremo a extremo: levanta un Redmine falso con N issues, mide getDataProject
+# y POST /data (importación en frío y repetida) contra SQLite o PostgreSQL, y emite JSON.
+# ATENCIÓN: con --database-url se borran y recrean todas las tablas; usar una base desechable.
+
+
+def makeConfig(database_url):
+    sqlite = database_url.startswith('sqlite')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        # Las opciones de pool y statement_timeout son específicas de PostgreSQL
+        SQLALCHEMY_ENGINE_OPTIONS = {} if sqlite else Config.SQLALCHEMY_ENGINE_OPTIONS
+        # SQLite solo admite un escritor: en paralelo los proyectos fallan con "database is locked"
+        IMPORT_PROJECT_CONCURRENCY = 1 if sqlite else Config.IMPORT_PROJECT_CONCURRENCY
+    return BenchConfig
+
+
+def startFakeRedmine(count, projects):
+    # En otro proceso, para que su memoria y su CPU no cuenten en las mediciones
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(count, 0, projects, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=300)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def _getJson(url):
+    with urlopen(url) as r:
+        return json.load(r)
+
+
+def seedCatalog(tracker_names, questions_per_device):
+    # Un dispositivo por tracker P_* con un bloque de preguntas
+    for tracker_name in tracker_names:
+        device = Device(name=tracker_name)
+        block = QuestionBlock(name=f"Bloque {tracker_name}")
+        db.session.add_all([device, block])
+        db.session.flush()
+        db.session.add(DeviceQuestionBlock(device_id=device.id, question_block_id=block.id))
+        db.session.add_all([
+            Question(
+                question_text=f"Pregunta {i} de {tracker_name}",
+                expected_result='OK',
+                question_block_id=block.id,
+                device_id=device.id
+            ) for i in range(questions_per_device)
+        ])
+    db.session.commit()
+
+
+class SqlCounter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.seconds = 0.0
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('bench_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        self.seconds += time.perf_counter() - conn.info['bench_start'].pop()
+
+    def reset(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+def measure(scenario, size, fn, redmine_url, counter):
+    _getJson(f"{redmine_url}/_reset")
+    counter.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    outcome = fn()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = _getJson(f"{redmine_url}/_stats")
+    return {
+        'scenario': scenario,
+        'issues': size,
+        'wall_seconds': round(wall, 4),
+        'http_pages': stats['pages'],
+        'http_issues': stats['issues'],
+        'sql_statements': counter.statements,
+        'sql_seconds': round(counter.seconds, 4),
+        'peak_memory_bytes': peak,
+        **outcome
+    }
+
+
+def runSize(size, args, workdir):
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, f'bench_{size}.db')}"
+    app = create_app(makeConfig(database_url))
+    process, redmine_url = startFakeRedmine(size, args.projects)
+    results = []
+
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            tracker_names = [
+                tracker['name'] for tracker in trackersOf(generateIssues(min(size, 100)))
+                if tracker['name'].startswith(app.config['REDMINE_TRACKER_PREFIX'])
+            ]
+            seedCatalog(tracker_names, args.questions)
+            counter = SqlCounter(db.engine)
+
+            def fetch():
+                data = getDataProject(redmine_url, 'bench', 'bench')
+                if not isinstance(data, list):
+                    return {'error': data.get('error')}
+                return {'subjects': sum(len(t['subjects']) for p in data for t in p['trackers'])}
+
+            client = app.test_client()
+
+            def postData(refresh=True):
+                # refresh evita la caché de descargas para medir siempre la descarga completa
+                response = client.post('/data', json={'url': redmine_url, 'user': 'bench', 'pass': 'bench', 'refresh': refresh})
+                # Con varios proyectos la respuesta es 200 aunque alguno falle: eso invalida la medición
+                failed = [
+                    project['project_name'] for project in (response.get_json(silent=True) or {}).get('projects', [])
+                    if not project.get('success')
+                ]
+                if response.status_code != 200 or failed:
+                    raise RuntimeError(f"POST /data falló (HTTP {response.status_code}, proyectos con error: {failed})")
+                return {'status_code': response.status_code, 'response_bytes': len(response.data)}
+
+            results.append(measure('fetch', size, fetch, redmine_url, counter))
+            results.append(measure('import_cold', size, postData, redmine_url, counter))
+            results.append(measure('import_warm', size, postData, redmine_url, counter))
+            results.append(measure('import_cached', size, lambda: postData(refresh=False), redmine_url, counter))
+    finally:
+        process.terminate()
+        process.join()
+        with app.app_context():
+            db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de getDataProject y POST /data')
+    parser.add_argument('--sizes', default='1000,10000', help='Número de issues por escenario, p. ej. 1000,10000,100000')
+    parser.add_argument('--projects', type=int, default=1)
+    parser.add_argument('--questions', type=int, default=10, help='Preguntas por dispositivo')
+    parser.add_argument('--database-url', default=None, help='Por defecto una base SQLite temporal por tamaño')
+    parser.add_argument('--output', default=None, help='Fichero JSON de resultados (por defecto stdout)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(value) for value in args.sizes.split(',')):
+            for result in runSize(size, args, workdir):
+                print(
+                    f"{result['scenario']:<12} {size:>7} issues  {result['wall_seconds']:>8.3f}s  "
+                    f"{result['http_pages']:>5} páginas  {result['sql_statements']:>6} SQL  "
+                    f"{result['peak_memory_bytes'] / 1e6:>8.1f} MB",
+                    file=sys.stderr
+                )
+                results.append(result)
+
+    report = {
+        'run_at': datetime.utcnow().isoformat(),
+        'database': 'sqlite' if not args.database_url else args.database_url.split(':', 1)[0],
+        'config': {
+            'page_limit': Config.REDMINE_PAGE_LIMIT,
+            'concurrency': Config.REDMINE_CONCURRENCY
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
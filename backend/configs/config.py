@@ -1,3 +1,4 @@
+import logging
 import os
 
 class Config:
@@ -12,5 +13,71 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pool del único engine de cada proceso. Cada worker de gunicorn abre como máximo
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW conexiones (peticiones, trabajos asíncronos, hilos por
+    # proyecto y escrituras de progreso salen todas de este pool). Si no se fijan, se reparte
+    # DB_CONNECTION_BUDGET (conexiones de este host en total) entre los workers; el presupuesto
+    # debe quedar por debajo de max_connections de PostgreSQL (100 por defecto) con margen para
+    # migraciones, psql y otros hosts.
+    DB_CONNECTION_BUDGET = int(os.getenv('DB_CONNECTION_BUDGET', '60'))
+    WEB_WORKERS = int(os.getenv('GUNICORN_WORKERS', '1'))  # Lo exporta gunicorn.conf.py
+    DB_CONNECTIONS_PER_WORKER = max(2, DB_CONNECTION_BUDGET // max(WEB_WORKERS, 1))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', str(DB_CONNECTIONS_PER_WORKER // 2)))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', str(DB_CONNECTIONS_PER_WORKER - DB_POOL_SIZE)))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Segundos esperando una conexión libre
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # Segundos antes de renovar una conexión
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '60000'))  # 0 desactiva el límite
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'connect_args': {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    }
+
+    # Descarga de issues desde Redmine
+    REDMINE_PAGE_LIMIT = int(os.getenv('REDMINE_PAGE_LIMIT', '100'))
+    REDMINE_CONCURRENCY = int(os.getenv('REDMINE_CONCURRENCY', '8'))  # Peticiones de páginas simultáneas
+    REDMINE_MAX_RETRIES = int(os.getenv('REDMINE_MAX_RETRIES', '5'))  # Reintentos ante 429/5xx
+    REDMINE_BACKOFF_FACTOR = float(os.getenv('REDMINE_BACKOFF_FACTOR', '0.5'))
+    REDMINE_TIMEOUT = float(os.getenv('REDMINE_TIMEOUT', '30'))
+    REDMINE_TRACKER_PREFIX = os.getenv('REDMINE_TRACKER_PREFIX', 'P_')  # Trackers que se importan
+    REDMINE_TRACKERS_TTL = int(os.getenv('REDMINE_TRACKERS_TTL', '3600'))  # Segundos de caché de /trackers.json
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')  # Snapshots JSONL.gz de páginas de Redmine
+    REDMINE_CACHE_TTL = int(os.getenv('REDMINE_CACHE_TTL', '60'))  # Segundos que se reutiliza una descarga (0 = sin caché)
+    REDMINE_CACHE_SIZE = int(os.getenv('REDMINE_CACHE_SIZE', '32'))  # Descargas guardadas como máximo (LRU)
+    # Coalescencia entre workers: advisory lock de PostgreSQL por descarga y resultado en crawl_results
+    REDMINE_CACHE_SHARED = os.getenv('REDMINE_CACHE_SHARED', 'true').lower() in ('1', 'true', 'yes')
+
+    # Segundos que vive la caché del catálogo de preguntas (cubre cambios hechos desde otros procesos)
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '300'))
+
+    # Importaciones asíncronas
+    IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '2'))  # Importaciones simultáneas por proceso
+    IMPORT_MAX_PENDING = int(os.getenv('IMPORT_MAX_PENDING', '20'))  # Trabajos en cola o en curso antes de rechazar
+    IMPORT_PROGRESS_INTERVAL = float(os.getenv('IMPORT_PROGRESS_INTERVAL', '1'))  # Segundos entre escrituras de progreso
+    IMPORT_PROJECT_CONCURRENCY = int(os.getenv('IMPORT_PROJECT_CONCURRENCY', '4'))  # Proyectos importados a la vez por petición
+    IMPORT_JOB_TIMEOUT = int(os.getenv('IMPORT_JOB_TIMEOUT', '3600'))  # Segundos tras los que un trabajo sin terminar se da por perdido
+
+    # Compresión de las respuestas JSON grandes
+    RESPONSE_GZIP_MIN_SIZE = int(os.getenv('RESPONSE_GZIP_MIN_SIZE', '1024'))  # Bytes a partir de los que se comprime
+    RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', '6'))
+
+    # Respuestas enviadas por lote en POST /responses/batch
+    ANSWERS_MAX_BATCH = int(os.getenv('ANSWERS_MAX_BATCH', '1000'))
+
+    # Paginación de GET /projects/<id>/tree (subtrackers por página)
+    PROJECT_TREE_PAGE_SIZE = int(os.getenv('PROJECT_TREE_PAGE_SIZE', '50'))
+    PROJECT_TREE_MAX_PAGE_SIZE = int(os.getenv('PROJECT_TREE_MAX_PAGE_SIZE', '200'))
+
+    # Filas leídas del cursor de servidor por bloque en la exportación CSV
+    EXPORT_YIELD_PER = int(os.getenv('EXPORT_YIELD_PER', '1000'))
+
+    # Nivel de logging de la aplicación (DEBUG, INFO, WARNING...)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
     def __init__(self):
-        print(f"Connecting to database at: {self.SQLALCHEMY_DATABASE_URI}")
+        logging.getLogger(__name__).info("Connecting to database at %s:%s/%s", self.DATABASE_HOST, self.DATABASE_PORT, self.DATABASE_NAME)
@@ -4,6 +4,7 @@ from .database import db
 # Tabla de proyectos (importados desde Redmine)
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (db.UniqueConstraint('name', name='uq_projects_name'),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -23,7 +24,7 @@ class Project(db.Model):
 class Device(db.Model):
     __tablename__ = 'devices'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     
     # Relación con los bloques de preguntas específicos de cada dispositivo
     question_blocks = db.relationship('QuestionBlock', secondary='device_question_block', backref=db.backref('devices', lazy='dynamic'))
@@ -36,11 +37,12 @@ class Device(db.Model):
 class DeviceQuestionBlock(db.Model):
     __tablename__ = 'device_question_block'
     device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), primary_key=True)
-    question_block_id = db.Column(db.Integer, db.ForeignKey('question_blocks.id'), primary_key=True)
+    question_block_id = db.Column(db.Integer, db.ForeignKey('question_blocks.id'), primary_key=True, index=True)
 
 
 class Subtracker(db.Model):
     __tablename__ = 'subtrackers'
+    __table_args__ = (db.UniqueConstraint('project_id', 'name', name='uq_subtrackers_project_name'),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
@@ -68,7 +70,7 @@ class Question(db.Model):
     question_text = db.Column(db.Text, nullable=False)  # Pregunta que será validada
     expected_result = db.Column(db.Text, nullable=False)  # El resultado esperado
 
-    question_block_id = db.Column(db.Integer, db.ForeignKey('question_blocks.id'), nullable=False)
+    question_block_id = db.Column(db.Integer, db.ForeignKey('question_blocks.id'), nullable=False, index=True)
     
     # Asociación de la pregunta con un dispositivo específico
     device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=True)
@@ -98,6 +100,7 @@ class Validation(db.Model):
 # Tabla de trabajadores (personas que realizan las validaciones)
 class Worker(db.Model):
     __tablename__ = 'workers'
+    __table_args__ = (db.UniqueConstraint('name', name='uq_workers_name'),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
 
@@ -111,10 +114,14 @@ class Worker(db.Model):
 # Tabla de respuestas (cada respuesta es una respuesta dada por un trabajador a una pregunta específica)
 class Response(db.Model):
     __tablename__ = 'responses'
+    # Una respuesta por pregunta, subtracker, dispositivo, proyecto y trabajador (necesario para ON CONFLICT)
+    __table_args__ = (
+        db.UniqueConstraint('subtracker_id', 'device_id', 'question_id', 'project_id', 'worker_id', name='uq_responses_scope'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'))
     subtracker_id = db.Column(db.Integer, db.ForeignKey('subtrackers.id'), nullable=False)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
     device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
     worker_id = db.Column(db.Integer, db.ForeignKey('workers.id'))
     response_text = db.Column(db.Text, nullable=True)
@@ -122,6 +129,11 @@ class Response(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     comments = db.Column(db.Text, nullable=True)
     responsable = db.Column(db.Text, nullable=True)
+    # Control de concurrencia optimista: cada actualización incrementa la versión
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __mapper_args__ = {'version_id_col': version}
 
     # Relaciones
     question = db.relationship('Question', back_populates='responses')
@@ -133,6 +145,86 @@ class Response(db.Model):
 # Tabla intermedia entre dispositivos y subtrackers
 class DeviceSubtracker(db.Model):
     __tablename__= 'devices_subtrackers'
+    __table_args__ = (db.UniqueConstraint('device_id', 'subtracker_id', name='uq_devices_subtrackers'),)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
+    subtracker_id = db.Column(db.Integer, db.ForeignKey('subtrackers.id'), nullable=False, index=True)
+
+# Estado de sincronización incremental con Redmine (cursor updated_on por URL, proyecto y
+# trabajador, porque las respuestas se crean por trabajador). redmine_project_id = 0 es la
+# fila de las descargas de todos los proyectos de la URL.
+class SyncState(db.Model):
+    __tablename__ = 'sync_states'
+    __table_args__ = (
+        db.UniqueConstraint('redmine_url', 'redmine_project_id', 'worker_id', name='uq_sync_states_url_project_worker'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    redmine_url = db.Column(db.String(255), nullable=False)
+    redmine_project_id = db.Column(db.Integer, nullable=False)
+    worker_id = db.Column(db.Integer, db.ForeignKey('workers.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True)  # None en la fila de todos los proyectos
+    last_updated_on = db.Column(db.DateTime, nullable=False)  # Mayor updated_on importado
+    visible_projects = db.Column(db.JSON, nullable=True)  # Ids de proyecto visibles en la última descarga completa de la URL
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    project = db.relationship('Project', backref=db.backref('sync_states', lazy=True))
+
+
+# Importaciones asíncronas lanzadas desde POST /data (estado consultable en GET /jobs/<id>)
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+    id = db.Column(db.String(36), primary_key=True)
+    redmine_url = db.Column(db.String(255), nullable=False)
+    worker_name = db.Column(db.String(100), nullable=False)
+    phase = db.Column(db.String(20), nullable=False, default='queued')  # queued, fetching, importing, done, failed
+    pages_fetched = db.Column(db.Integer, nullable=False, default=0)
+    total_pages = db.Column(db.Integer, nullable=True)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # El resultado completo solo se carga cuando se pide explícitamente
+    result = db.deferred(db.Column(db.JSON, nullable=True))
+
+
+# Resumen de respuestas por estado, mantenido en la misma transacción que las escrituras
+# de responses (ver services/responseSummary.py). Las respuestas sin trabajador no se cuentan.
+class ResponseSummary(db.Model):
+    __tablename__ = 'response_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'device_id', 'subtracker_id', 'worker_id', 'status', name='uq_response_summaries_scope'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
-    subtracker_id = db.Column(db.Integer, db.ForeignKey('subtrackers.id'), nullable=False)
\ No newline at end of file
+    subtracker_id = db.Column(db.Integer, db.ForeignKey('subtrackers.id'), nullable=False)
+    worker_id = db.Column(db.Integer, db.ForeignKey('workers.id'), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Huella del contenido importado por proyecto, dispositivo (tracker) y trabajador: dispositivo,
+# subjects y preguntas. Si una reimportación trae la misma huella se omite ese subárbol.
+class ImportFingerprint(db.Model):
+    __tablename__ = 'import_fingerprints'
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'device_id', 'worker_id', name='uq_import_fingerprints_scope'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
+    worker_id = db.Column(db.Integer, db.ForeignKey('workers.id'), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 en hexadecimal
+    subjects = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Resultado de una descarga de Redmine compartido entre workers (ver services/crawlStore.py).
+# key es el sha256 de la clave de la caché en proceso de getDataProjectShared.
+class CrawlResult(db.Model):
+    __tablename__ = 'crawl_results'
+    key = db.Column(db.String(64), primary_key=True)
+    fetched_at = db.Column(db.DateTime, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
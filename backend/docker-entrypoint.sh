@@ -0,0 +1,16 @@
+#!/bin/sh
+set -e
+
+# Los ficheros de métricas de una ejecución anterior no deben sumarse a los nuevos
+if [ -n "${PROMETHEUS_MULTIPROC_DIR}" ]; then
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+    mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
+# Aplica las migraciones pendientes (también crea el esquema en una base vacía)
+# antes de arrancar el servidor. RUN_MIGRATIONS=0 lo desactiva.
+if [ "${RUN_MIGRATIONS:-1}" != "0" ]; then
+    flask --app wsgi db upgrade
+fi
+
+exec "$@"
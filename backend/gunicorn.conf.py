@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+
+# Configuración de gunicorn para producción (ver wsgi.py)
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:7575')
+# Pocos workers con varios hilos: cada worker tiene su pool de conexiones, así que más workers
+# significan más conexiones. Las descargas de Redmine iguales se coordinan entre workers con
+# un advisory lock de PostgreSQL y la tabla crawl_results (ver services/crawlStore.py)
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count() + 1, 4))))
+# Los workers leen este valor para repartirse DB_CONNECTION_BUDGET (ver configs/config.py)
+os.environ['GUNICORN_WORKERS'] = str(workers)
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Las importaciones síncronas de proyectos grandes pueden tardar; las largas deberían usar "async"
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Reciclar workers acota el crecimiento de memoria, pero mata las importaciones asíncronas
+# que se ejecutan dentro del worker: desactivado por defecto. Si se activa, los trabajos
+# interrumpidos se marcan como fallidos pasado IMPORT_JOB_TIMEOUT (ver services/importJobs.py)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+# Sin preload: cada worker crea su propia app y su engine después del fork,
+# así no se comparten conexiones entre procesos
+preload_app = False
+
+
+def child_exit(server, worker):
+    # Métricas multiproceso: los histogramas del worker se conservan en el directorio
+    # compartido; solo se marcan como muertos sus gauges
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
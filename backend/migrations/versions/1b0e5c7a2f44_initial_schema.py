@@ -0,0 +1,129 @@
+"""Esquema inicial (tablas que creaba db.create_all() antes de usar migraciones)
+
+Revision ID: 1b0e5c7a2f44
+Revises:
+Create Date: 2026-10-17 11:00:00.000000
+
+Crea solo las tablas que falten, así que sirve tanto para una base vacía como para
+bases creadas con db.create_all(). Los índices y restricciones únicas los añade la
+revisión siguiente.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b0e5c7a2f44'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# En orden de dependencias de las claves foráneas
+TABLES = [
+    ('projects', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('devices', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('question_blocks', lambda: [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('workers', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('device_question_block', lambda: [
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('question_block_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['question_block_id'], ['question_blocks.id']),
+        sa.PrimaryKeyConstraint('device_id', 'question_block_id')
+    ]),
+    ('subtrackers', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('questions', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('question_text', sa.Text(), nullable=False),
+        sa.Column('expected_result', sa.Text(), nullable=False),
+        sa.Column('question_block_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['question_block_id'], ['question_blocks.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('validations', lambda: [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('subtracker_id', sa.Integer(), nullable=True),
+        sa.Column('worker_id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('validation_result', sa.String(length=100), nullable=True),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.Column('validated_by', sa.String(length=100), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.ForeignKeyConstraint(['subtracker_id'], ['subtrackers.id']),
+        sa.ForeignKeyConstraint(['worker_id'], ['workers.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('responses', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=True),
+        sa.Column('subtracker_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.Integer(), nullable=True),
+        sa.Column('response_text', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.Column('responsable', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id']),
+        sa.ForeignKeyConstraint(['subtracker_id'], ['subtrackers.id']),
+        sa.ForeignKeyConstraint(['worker_id'], ['workers.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+    ('devices_subtrackers', lambda: [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('subtracker_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['subtracker_id'], ['subtrackers.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]),
+]
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, columns in TABLES:
+        if name not in tables:
+            op.create_table(name, *columns())
+
+
+def downgrade():
+    for name, columns in reversed(TABLES):
+        op.drop_table(name)
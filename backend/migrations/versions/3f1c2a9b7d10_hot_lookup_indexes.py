@@ -0,0 +1,120 @@
+"""Índices y restricciones únicas para las búsquedas de la importación
+
+Revision ID: 3f1c2a9b7d10
+Revises: 1b0e5c7a2f44
+Create Date: 2026-10-17 12:00:00.000000
+
+Las tablas base las crea 1b0e5c7a2f44 (o db.create_all() en bases antiguas): cada paso
+comprueba si el objeto ya existe, así que es segura tanto sobre esquemas antiguos como nuevos.
+Antes de crear las restricciones únicas se fusionan los duplicados existentes,
+reapuntando las claves foráneas a la fila de menor id.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = '1b0e5c7a2f44'
+branch_labels = None
+depends_on = None
+
+
+UNIQUE_CONSTRAINTS = [
+    ('uq_projects_name', 'projects', ['name']),
+    ('uq_workers_name', 'workers', ['name']),
+    ('uq_subtrackers_project_name', 'subtrackers', ['project_id', 'name']),
+    ('uq_devices_subtrackers', 'devices_subtrackers', ['device_id', 'subtracker_id']),
+    ('uq_responses_scope', 'responses', ['subtracker_id', 'device_id', 'question_id', 'project_id', 'worker_id']),
+]
+
+INDEXES = [
+    ('ix_devices_name', 'devices', ['name']),
+    ('ix_questions_question_block_id', 'questions', ['question_block_id']),
+    ('ix_device_question_block_question_block_id', 'device_question_block', ['question_block_id']),
+    ('ix_devices_subtrackers_subtracker_id', 'devices_subtrackers', ['subtracker_id']),
+    ('ix_responses_project_id', 'responses', ['project_id']),
+]
+
+# Tabla -> (columnas que la hacen única, [(tabla, columna) que la referencian])
+MERGE_DUPLICATES = [
+    ('projects', ['name'], [
+        ('subtrackers', 'project_id'),
+        ('responses', 'project_id'),
+        ('validations', 'project_id'),
+        ('sync_states', 'project_id'),
+    ]),
+    ('workers', ['name'], [
+        ('responses', 'worker_id'),
+        ('validations', 'worker_id'),
+    ]),
+    ('subtrackers', ['project_id', 'name'], [
+        ('responses', 'subtracker_id'),
+        ('validations', 'subtracker_id'),
+        ('devices_subtrackers', 'subtracker_id'),
+    ]),
+    ('devices_subtrackers', ['device_id', 'subtracker_id'], []),
+    ('responses', ['subtracker_id', 'device_id', 'question_id', 'project_id', 'worker_id'], []),
+]
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _merge_duplicates(table, columns, references, tables):
+    keep = (
+        f"SELECT id, min(id) OVER (PARTITION BY {', '.join(columns)}) AS keep_id FROM {table}"
+    )
+    for ref_table, ref_column in references:
+        if ref_table in tables:
+            op.execute(
+                f"UPDATE {ref_table} r SET {ref_column} = d.keep_id FROM ({keep}) d "
+                f"WHERE r.{ref_column} = d.id AND d.id <> d.keep_id"
+            )
+    op.execute(f"DELETE FROM {table} t USING ({keep}) d WHERE t.id = d.id AND d.id <> d.keep_id")
+
+
+def upgrade():
+    inspector = _inspector()
+    tables = set(inspector.get_table_names())
+
+    if 'sync_states' not in tables:
+        op.create_table(
+            'sync_states',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('redmine_url', sa.String(length=255), nullable=False),
+            sa.Column('redmine_project_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('last_updated_on', sa.DateTime(), nullable=False),
+            sa.Column('synced_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('redmine_url', 'redmine_project_id', name='uq_sync_states_url_project')
+        )
+        tables.add('sync_states')
+
+    for name, table, columns in UNIQUE_CONSTRAINTS:
+        existing = {uc['name'] for uc in inspector.get_unique_constraints(table)}
+        if name in existing:
+            continue
+        for merge_table, merge_columns, references in MERGE_DUPLICATES:
+            if merge_table == table:
+                _merge_duplicates(merge_table, merge_columns, references, tables)
+        op.create_unique_constraint(name, table, columns)
+
+    for name, table, columns in INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    for name, table, columns in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, table, type_='unique')
+
+    op.drop_table('sync_states')
@@ -0,0 +1,41 @@
+"""Tabla import_jobs para las importaciones asíncronas
+
+Revision ID: 8a4e6d2c5b31
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c5b31'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'import_jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('redmine_url', sa.String(length=255), nullable=False),
+        sa.Column('worker_name', sa.String(length=100), nullable=False),
+        sa.Column('phase', sa.String(length=20), nullable=False),
+        sa.Column('pages_fetched', sa.Integer(), nullable=False),
+        sa.Column('total_pages', sa.Integer(), nullable=True),
+        sa.Column('rows_written', sa.Integer(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('import_jobs')
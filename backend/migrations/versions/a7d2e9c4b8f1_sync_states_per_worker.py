@@ -0,0 +1,46 @@
+"""Cursores de sincronización por trabajador en sync_states
+
+Revision ID: a7d2e9c4b8f1
+Revises: f3a8c1d6e9b2
+Create Date: 2026-10-18 10:00:00.000000
+
+Los cursores existentes no dicen para qué trabajador se importaron, así que se descartan:
+la siguiente importación incremental de cada trabajador hace una descarga completa.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e9c4b8f1'
+down_revision = 'f3a8c1d6e9b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('sync_states')}
+    if 'worker_id' in columns:
+        return
+    op.execute("DELETE FROM sync_states")
+    with op.batch_alter_table('sync_states') as batch:
+        batch.drop_constraint('uq_sync_states_url_project', type_='unique')
+        batch.add_column(sa.Column('worker_id', sa.Integer(), nullable=False))
+        batch.add_column(sa.Column('visible_projects', sa.JSON(), nullable=True))
+        batch.alter_column('project_id', existing_type=sa.Integer(), nullable=True)
+        batch.create_foreign_key('fk_sync_states_worker_id', 'workers', ['worker_id'], ['id'])
+        batch.create_unique_constraint(
+            'uq_sync_states_url_project_worker', ['redmine_url', 'redmine_project_id', 'worker_id']
+        )
+
+
+def downgrade():
+    op.execute("DELETE FROM sync_states")
+    with op.batch_alter_table('sync_states') as batch:
+        batch.drop_constraint('uq_sync_states_url_project_worker', type_='unique')
+        batch.drop_constraint('fk_sync_states_worker_id', type_='foreignkey')
+        batch.drop_column('visible_projects')
+        batch.drop_column('worker_id')
+        batch.alter_column('project_id', existing_type=sa.Integer(), nullable=False)
+        batch.create_unique_constraint('uq_sync_states_url_project', ['redmine_url', 'redmine_project_id'])
@@ -0,0 +1,32 @@
+"""Tabla crawl_results para compartir descargas de Redmine entre workers
+
+Revision ID: b9e3d5a1c7f4
+Revises: a7d2e9c4b8f1
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e3d5a1c7f4'
+down_revision = 'a7d2e9c4b8f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'crawl_results' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'crawl_results',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('crawl_results')
@@ -0,0 +1,49 @@
+"""Tabla response_summaries para el progreso de validación
+
+Revision ID: c27d9e4f1a86
+Revises: 8a4e6d2c5b31
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d9e4f1a86'
+down_revision = '8a4e6d2c5b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'response_summaries' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'response_summaries',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('subtracker_id', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.ForeignKeyConstraint(['subtracker_id'], ['subtrackers.id']),
+        sa.ForeignKeyConstraint(['worker_id'], ['workers.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id', 'device_id', 'subtracker_id', 'worker_id', 'status', name='uq_response_summaries_scope')
+    )
+
+    # Carga inicial a partir de las respuestas existentes
+    op.execute(
+        "INSERT INTO response_summaries (project_id, device_id, subtracker_id, worker_id, status, count) "
+        "SELECT project_id, device_id, subtracker_id, worker_id, status, count(*) FROM responses "
+        "WHERE worker_id IS NOT NULL "
+        "GROUP BY project_id, device_id, subtracker_id, worker_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('response_summaries')
@@ -0,0 +1,29 @@
+"""Versión y fecha de actualización en responses (concurrencia optimista)
+
+Revision ID: e51b7f0a3c42
+Revises: c27d9e4f1a86
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e51b7f0a3c42'
+down_revision = 'c27d9e4f1a86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('responses')}
+    if 'version' not in columns:
+        op.add_column('responses', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    if 'updated_at' not in columns:
+        op.add_column('responses', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('responses', 'updated_at')
+    op.drop_column('responses', 'version')
@@ -0,0 +1,41 @@
+"""Tabla import_fingerprints para omitir subárboles sin cambios al reimportar
+
+Revision ID: f3a8c1d6e9b2
+Revises: e51b7f0a3c42
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c1d6e9b2'
+down_revision = 'e51b7f0a3c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'import_fingerprints' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    # Sin carga inicial: la primera reimportación de cada proyecto calcula y guarda las huellas
+    op.create_table(
+        'import_fingerprints',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('subjects', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.ForeignKeyConstraint(['worker_id'], ['workers.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id', 'device_id', 'worker_id', name='uq_import_fingerprints_scope')
+    )
+
+
+def downgrade():
+    op.drop_table('import_fingerprints')
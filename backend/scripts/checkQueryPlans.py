@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+
+# Permite ejecutar el script desde backend/ con: python scripts/checkQueryPlans.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app import create_app
+from configs.database import db
+
+# Búsquedas calientes de la importación y la tabla cuyo acceso debe ir por índice
+HOT_LOOKUPS = [
+    ('Project.name', 'projects',
+     "SELECT id FROM projects WHERE name = :name",
+     {'name': 'x'}),
+    ('Worker.name', 'workers',
+     "SELECT id FROM workers WHERE name = :name",
+     {'name': 'x'}),
+    ('Subtracker(project_id, name)', 'subtrackers',
+     "SELECT id FROM subtrackers WHERE project_id = :project_id AND name = :name",
+     {'project_id': 1, 'name': 'x'}),
+    ('Device.name', 'devices',
+     "SELECT id FROM devices WHERE name = :name",
+     {'name': 'x'}),
+    ('DeviceSubtracker(device_id, subtracker_id)', 'devices_subtrackers',
+     "SELECT id FROM devices_subtrackers WHERE device_id = :device_id AND subtracker_id = :subtracker_id",
+     {'device_id': 1, 'subtracker_id': 1}),
+    ('Response (5 columnas)', 'responses',
+     "SELECT id FROM responses WHERE subtracker_id = :subtracker_id AND device_id = :device_id "
+     "AND question_id = :question_id AND project_id = :project_id AND worker_id = :worker_id",
+     {'subtracker_id': 1, 'device_id': 1, 'question_id': 1, 'project_id': 1, 'worker_id': 1}),
+    ('Response.project_id', 'responses',
+     "SELECT id FROM responses WHERE project_id = :project_id",
+     {'project_id': 1}),
+]
+
+INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def _scanNodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _scanNodes(child)
+
+
+def checkPlan(sql, params, table):
+    # Con tablas pequeñas el planificador prefiere un Seq Scan aunque exista índice;
+    # desactivarlo en la transacción comprueba que hay un índice utilizable.
+    with db.engine.connect() as connection:
+        with connection.begin():
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [node for node in _scanNodes(plan[0]['Plan']) if node.get('Relation Name') == table
+             or (node['Node Type'] == 'Bitmap Index Scan')]
+    return any(node['Node Type'] in INDEX_NODES for node in nodes), [node['Node Type'] for node in nodes]
+
+
+def main():
+    failed = 0
+    with create_app().app_context():
+        for name, table, sql, params in HOT_LOOKUPS:
+            ok, node_types = checkPlan(sql, params, table)
+            print(f"{'OK   ' if ok else 'FALLO'} {name}: {', '.join(node_types)}")
+            failed += not ok
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
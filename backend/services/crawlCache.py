@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressFanout:
+    # Reparte el progreso de una descarga entre todas las peticiones que la esperan.
+    # Quien se une tarde recibe de golpe las páginas ya descargadas.
+    def __init__(self):
+        self.pages = 0
+        self.total_pages = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add(self, progress):
+        if progress is None:
+            return
+        with self._lock:
+            self._listeners.append(progress)
+            pages, total_pages = self.pages, self.total_pages
+        if pages or total_pages is not None:
+            progress.addPages(pages, total_pages)
+
+    def pageFetched(self, total_pages=None):
+        with self._lock:
+            self.pages += 1
+            if total_pages is not None:
+                self.total_pages = total_pages
+            listeners = list(self._listeners)
+        for progress in listeners:
+            try:
+                progress.pageFetched(total_pages)
+            except Exception:
+                # Un error al registrar el progreso de otro no debe cortar la descarga compartida
+                logger.exception("Error registrando el progreso de una descarga compartida")
+
+
+class CrawlCache:
+    # Caché LRU con TTL y coalescencia de peticiones ("single flight") para descargas de Redmine.
+    #  - Si ya hay una descarga en curso con la misma clave, se espera a su resultado
+    #    en lugar de lanzar otra.
+    #  - El resultado se guarda ttl segundos (máximo max_size entradas, se expulsa la
+    #    menos usada). ttl=0 desactiva la caché pero mantiene la coalescencia.
+    # Los valores se comparten entre peticiones: quien los recibe no debe modificarlos.
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clave -> (instante, valor)
+        self._inflight = {}  # clave -> (Future, ProgressFanout)
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, bypass=False, cacheable=None, progress=None):
+        # loader(progress) hace la descarga; recibe un ProgressFanout que avisa a todos los que esperan.
+        # bypass=True ignora el valor guardado (pero se une a una descarga en curso).
+        # cacheable(valor) decide si el resultado se guarda (p. ej. no guardar errores).
+        # progress (opcional) recibe pageFetched/addPages de la descarga, propia o compartida.
+        with self._lock:
+            if not bypass:
+                cached = self._entries.get(key)
+                if cached and time.monotonic() - cached[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    logger.debug("Descarga de Redmine servida desde caché")
+                    return cached[1]
+
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = (Future(), ProgressFanout())
+        future, fanout = inflight
+        fanout.add(progress)
+
+        if not leader:
+            logger.debug("Esperando a una descarga de Redmine en curso")
+            return future.result()
+
+        try:
+            value = loader(fanout)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self.ttl > 0 and self.max_size > 0 and (cacheable is None or cacheable(value)):
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
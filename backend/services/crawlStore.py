@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, text
+
+from configs.database import db, upsertInsert
+from configs.models import CrawlResult
+from services.syncState import formatRedmineDate, parseRedmineDate
+
+logger = logging.getLogger(__name__)
+
+
+# Coalescencia de descargas de Redmine entre procesos (workers de gunicorn u otros hosts).
+# CrawlCache solo agrupa las peticiones de un mismo proceso; aquí el líder de cada proceso
+# toma un advisory lock de PostgreSQL por clave, así solo un proceso descarga a la vez, y
+# el resultado queda en crawl_results para los que estaban esperando el bloqueo.
+# En SQLite (benchmarks) o con REDMINE_CACHE_SHARED desactivado se descarga directamente.
+def loadShared(key, loader, fanout, bypass=False, cacheable=None):
+    if not current_app.config['REDMINE_CACHE_SHARED'] or db.engine.dialect.name != 'postgresql':
+        return loader(fanout)
+
+    digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+    # pg_advisory_lock recibe un bigint con signo
+    lock_id = int.from_bytes(bytes.fromhex(digest[:16]), 'big', signed=True)
+    ttl = current_app.config['REDMINE_CACHE_TTL']
+    requested_at = datetime.utcnow()
+
+    # Conexión propia: el bloqueo es de sesión y debe liberarse en la misma conexión,
+    # sin depender de la transacción de la petición
+    with db.engine.connect() as conn:
+        conn.execute(text('SELECT pg_advisory_lock(:lock_id)'), {'lock_id': lock_id})
+        try:
+            row = conn.execute(
+                select(CrawlResult.fetched_at, CrawlResult.payload).where(CrawlResult.key == digest)
+            ).first()
+            conn.commit()
+            # Vale el resultado de una descarga terminada mientras se esperaba el bloqueo y,
+            # sin bypass, cualquiera de menos de ttl segundos
+            if row and (
+                row.fetched_at >= requested_at
+                or (not bypass and ttl > 0 and datetime.utcnow() - row.fetched_at < timedelta(seconds=ttl))
+            ):
+                logger.debug("Descarga de Redmine servida por otro proceso")
+                return _decode(row.payload)
+
+            value = loader(fanout)
+            if cacheable is None or cacheable(value):
+                _save(conn, digest, value, ttl)
+            return value
+        finally:
+            conn.execute(text('SELECT pg_advisory_unlock(:lock_id)'), {'lock_id': lock_id})
+            conn.commit()
+
+
+def _save(conn, digest, value, ttl):
+    # Si no se puede guardar, la descarga ya hecha sigue valiendo para esta petición
+    now = datetime.utcnow()
+    try:
+        stmt = upsertInsert(CrawlResult).values(key=digest, fetched_at=now, payload=_encode(value))
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[CrawlResult.key],
+            set_={'fetched_at': stmt.excluded.fetched_at, 'payload': stmt.excluded.payload}
+        ))
+        # Limpieza de resultados caducados de otras claves
+        conn.execute(delete(CrawlResult).where(CrawlResult.fetched_at < now - timedelta(seconds=ttl)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        logger.exception("No se pudo guardar la descarga de Redmine compartida")
+
+
+def _encode(projects):
+    # last_updated_on es datetime: se guarda en el formato de Redmine
+    return [
+        {**project, 'last_updated_on': formatRedmineDate(project['last_updated_on']) if project.get('last_updated_on') else None}
+        for project in projects
+    ]
+
+
+def _decode(payload):
+    return [
+        {**project, 'last_updated_on': parseRedmineDate(project.get('last_updated_on'))}
+        for project in payload
+    ]
@@ -1,121 +1,273 @@
+import hashlib
+import threading
+import time
+from contextlib import nullcontext
+
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from flask import current_app
+from urllib3.util.retry import Retry
+
+from services.crawlCache import CrawlCache
+from services.crawlStore import loadShared
+from services.issueAggregator import IssueAggregator
+from services.issueStream import SnapshotWriter, iterFileIssues
+from services.metrics import currentMetrics
+from services.syncState import formatRedmineDate
+
+
+# Máximo de issues por página que devuelve Redmine (si la respuesta no trae 'limit')
+REDMINE_MAX_PAGE_LIMIT = 100
+
+
+def createRedmineSession(user, passw, pool_size=None):
+    # Sesión keep-alive compartida por todos los hilos, con reintentos y backoff ante 429/5xx
+    pool_size = pool_size or current_app.config['REDMINE_CONCURRENCY']
+    retry = Retry(
+        total=current_app.config['REDMINE_MAX_RETRIES'],
+        backoff_factor=current_app.config['REDMINE_BACKOFF_FACTOR'],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.auth = HTTPBasicAuth(user, passw)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def fetchIssuesPage(session, url, offset, limit, filters=None, timeout=None):
+    # Se llama desde hilos sin contexto de aplicación: el timeout lo pasa quien lo tiene
+    r = session.get(
+        f"{url}/issues.json",
+        params={**(filters or {}), 'limit': limit, 'offset': offset},
+        timeout=timeout
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+# Caché de trackers por URL de Redmine: {url: (instante, [{'id': ..., 'name': ...}] o None)}
+# None indica que el servidor no expone /trackers.json
+_trackers_cache = {}
+_trackers_lock = threading.Lock()
 
 
-def getDataProject(url, user, passw):
-    offset = 0
-    limit = 100
-    grouped_projects = {}
-    duplicados = []
-    seen = set()
+def _cachedTrackers(url):
+    with _trackers_lock:
+        cached = _trackers_cache.get(url)
+    if cached and time.monotonic() - cached[0] < current_app.config['REDMINE_TRACKERS_TTL']:
+        return True, cached[1]
+    return False, None
 
-    while True:
-        try:
-            r = requests.get(f"{url}/issues.json?limit={limit}&offset={offset}", auth=HTTPBasicAuth(user, passw))
+
+def getTrackerIds(session, url, prefix=None):
+    # Resuelve los trackers cuyo nombre empieza por el prefijo a ids con una sola
+    # consulta a /trackers.json por URL, cacheada durante REDMINE_TRACKERS_TTL segundos.
+    # Devuelve None si el servidor no expone /trackers.json (se filtra en cliente).
+    # La petición se hace fuera del bloqueo: un Redmine lento no frena a los demás.
+    prefix = current_app.config['REDMINE_TRACKER_PREFIX'] if prefix is None else prefix
+    found, trackers = _cachedTrackers(url)
+    if not found:
+        r = session.get(f"{url}/trackers.json", timeout=current_app.config['REDMINE_TIMEOUT'])
+        if r.status_code in (403, 404):
+            trackers = None
+        else:
             r.raise_for_status()
+            trackers = r.json().get('trackers', [])
+        with _trackers_lock:
+            _trackers_cache[url] = (time.monotonic(), trackers)
+
+    if trackers is None:
+        return None
+    return [tracker['id'] for tracker in trackers if tracker['name'].startswith(prefix)]
+
+
+def getVisibleProjectIds(url, user, passw):
+    # Ids de los proyectos que ve el usuario (/projects.json, paginado).
+    # None si el servidor no lo expone o falla: entonces no se usa cursor incremental
+    ids = []
+    try:
+        with createRedmineSession(user, passw, 1) as session:
+            while True:
+                r = session.get(
+                    f"{url}/projects.json",
+                    params={'limit': REDMINE_MAX_PAGE_LIMIT, 'offset': len(ids)},
+                    timeout=current_app.config['REDMINE_TIMEOUT']
+                )
+                if r.status_code in (403, 404):
+                    return None
+                r.raise_for_status()
+                page = r.json()
+                projects = page.get('projects', [])
+                ids.extend(project['id'] for project in projects)
+                if not projects or len(ids) >= page.get('total_count', 0):
+                    return ids
+    except requests.exceptions.RequestException:
+        return None
+
+
+def buildIssueFilters(session, url, project_id=None, updated_since=None):
+    # Filtros de servidor: solo los trackers P_*, el proyecto pedido y cualquier estado.
+    # Devuelve None si no hay ningún tracker que importar.
+    tracker_ids = getTrackerIds(session, url)
+    if tracker_ids == []:
+        return None
+
+    filters = {'status_id': '*'}
+    if tracker_ids:
+        filters['tracker_id'] = '|'.join(str(tracker_id) for tracker_id in tracker_ids)
+    if project_id:
+        filters['project_id'] = project_id
+    if updated_since:
+        # Sincronización incremental: solo issues modificadas desde el último cursor
+        filters['updated_on'] = f">={formatRedmineDate(updated_since)}"
+    return filters
+
+
+def iterIssuePages(session, url, limit=None, concurrency=None, filters=None, progress=None):
+    # Descarga la primera página y, conocido total_count, el resto de offsets en paralelo.
+    # Genera las páginas en orden de offset según se consumen, sin acumularlas.
+    # filters se añade como filtros de Redmine.
+    limit = limit or current_app.config['REDMINE_PAGE_LIMIT']
+    concurrency = concurrency or current_app.config['REDMINE_CONCURRENCY']
+    timeout = current_app.config['REDMINE_TIMEOUT']
+
+    request_metrics = currentMetrics()
+
+    def timedFetch(offset):
+        start = time.perf_counter()
+        page = fetchIssuesPage(session, url, offset, limit, filters, timeout)
+        if request_metrics:
+            request_metrics.addHttp(time.perf_counter() - start)
+        return page
+
+    def fetch(offset):
+        page = timedFetch(offset)
+        if progress:
+            progress.pageFetched()
+        return page
+
+    page = timedFetch(0)
+    # Redmine limita el tamaño de página (100 por defecto): los offsets avanzan según el
+    # tamaño que devuelve el servidor, no el pedido, para no saltarse issues
+    step = min(limit, page.get('limit') or REDMINE_MAX_PAGE_LIMIT)
+    total_count = page.get('total_count')
+    if progress:
+        progress.pageFetched(total_pages=-(-total_count // step) if total_count is not None else None)
+    yield page
+
+    if total_count is None:
+        # Sin total_count no se conocen los offsets: se pagina secuencialmente
+        offset = 0
+        while len(page['issues']) >= step:
+            offset += step
+            page = fetch(offset)
+            yield page
+        return
+
+    offsets = range(step, total_count, step)
+    if concurrency <= 1:
+        for offset in offsets:
+            yield fetch(offset)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # map conserva el orden de los offsets
+        yield from executor.map(fetch, offsets)
+
+
+def getDataProject(url, user, passw, concurrency=None, updated_since=None, project_id=None, progress=None,
+                   snapshot_path=None, tracker_filter=None, project_filter=None):
+    # snapshot_path: si se indica, cada página cruda se guarda en ese JSONL (gzip si acaba
+    # en .gz) para poder repetir la importación con getDataFromFile sin llamar a Redmine
+    limit = current_app.config['REDMINE_PAGE_LIMIT']
+    concurrency = concurrency or current_app.config['REDMINE_CONCURRENCY']
+    aggregator = IssueAggregator(user, tracker_filter, project_filter)
+
+    try:
+        with createRedmineSession(user, passw, concurrency) as session, \
+                (SnapshotWriter(snapshot_path) if snapshot_path else nullcontext()) as snapshot:
+            filters = buildIssueFilters(session, url, project_id, updated_since)
+            pages = iterIssuePages(session, url, limit, concurrency, filters, progress) if filters is not None else []
+
+            # Cada página se agrupa y se descarta en cuanto llega
+            for page in pages:
+                if snapshot:
+                    snapshot.write(page)
+                aggregator.addPage(page)
+
+    except requests.exceptions.HTTPError as http_err:
+        return {'error': f"Errorr: {http_err}", 'status_code': http_err.response.status_code}
+    except Exception as err:
+        return {'error': f"Errror: {err}"}
+
+    return aggregator.result()
+
+# Descargas compartidas entre peticiones concurrentes con los mismos parámetros: una caché
+# por aplicación, con el tamaño y TTL de su configuración
+_crawl_cache_lock = threading.Lock()
+
+
+def _getCrawlCache():
+    with _crawl_cache_lock:
+        cache = current_app.extensions.get('crawl_cache')
+        if cache is None:
+            cache = current_app.extensions['crawl_cache'] = CrawlCache(
+                current_app.config['REDMINE_CACHE_SIZE'], current_app.config['REDMINE_CACHE_TTL']
+            )
+        return cache
+
+
+def getDataProjectShared(url, user, passw, updated_since=None, project_id=None, progress=None,
+                         snapshot_path=None, bypass_cache=False):
+    # Como getDataProject, pero las peticiones simultáneas con la misma URL, usuario y
+    # filtros esperan a una única descarga, y el resultado se reutiliza REDMINE_CACHE_TTL
+    # segundos, también entre workers (ver services/crawlStore.py). bypass_cache fuerza una
+    # descarga nueva. Con snapshot_path siempre se descarga, porque las páginas tienen que
+    # escribirse en el fichero.
+    if snapshot_path:
+        return getDataProject(url, user, passw, updated_since=updated_since, project_id=project_id,
+                              progress=progress, snapshot_path=snapshot_path)
+
+    key = (
+        url.rstrip('/'),
+        user,
+        # La contraseña forma parte de la clave (resumida) para no servir datos a credenciales distintas
+        hashlib.sha256(passw.encode('utf-8')).hexdigest(),
+        str(project_id) if project_id else None,
+        formatRedmineDate(updated_since) if updated_since else None,
+        current_app.config['REDMINE_TRACKER_PREFIX']
+    )
+    def load(fanout):
+        return getDataProject(url, user, passw, updated_since=updated_since, project_id=project_id, progress=fanout)
 
-            issues = r.json()
-
-            for issue in issues['issues']:
-                nombre_proyecto = issue['project']['name']
-                id_proyecto = issue['project']['id']
-                tracker_name = issue['tracker']['name']
-                issue_subject = issue['subject']
-
-                if tracker_name.startswith('P_'):
-                    # Si el proyecto no existe aún, lo creamos
-                    if id_proyecto not in grouped_projects:
-                        grouped_projects[id_proyecto] = {
-                            'worker_name': user,  
-                            'project_id': id_proyecto,
-                            'project_name': nombre_proyecto,
-                            'trackers': {}
-                        }
-
-                    # Si el tracker_name no existe aún en este proyecto, lo creamos
-                    if tracker_name not in grouped_projects[id_proyecto]['trackers']:
-                        grouped_projects[id_proyecto]['trackers'][tracker_name] = {
-                            'tracker_name': tracker_name,
-                            'subjects': []
-                        }
-
-                    if issue_subject not in grouped_projects[id_proyecto]['trackers'][tracker_name]['subjects']:
-                        grouped_projects[id_proyecto]['trackers'][tracker_name]['subjects'].append(issue_subject)
-
-                    # Comprobación de duplicados
-                    if tracker_name in seen:
-                        duplicados.append(tracker_name)
-                    else:
-                        seen.add(tracker_name)
-
-            if len(issues['issues']) < limit:
-                break
-
-            offset += limit
-
-        except requests.exceptions.HTTPError as http_err:
-            return {'error': f"Errorr: {http_err}", 'status_code': r.status_code}
-        except Exception as err:
-            return {'error': f"Errror: {err}"}
-
-    all_trackers = [
-        {
-            'worker_name': project['worker_name'],  
-            'project_id': project['project_id'],
-            'project_name': project['project_name'],
-            'trackers': [
-                {
-                    'tracker_name': tracker['tracker_name'],
-                    'subjects': tracker['subjects']
-                } for tracker in project['trackers'].values()
-            ]
-        } for project in grouped_projects.values()
-    ]
-    return all_trackers
+    # Los errores no se guardan: la siguiente petición vuelve a intentarlo
+    cacheable = lambda data: isinstance(data, list)
+    return _getCrawlCache().get(
+        key,
+        # El líder de este proceso se coordina con los demás procesos antes de descargar
+        lambda fanout: loadShared(key, load, fanout, bypass=bypass_cache, cacheable=cacheable),
+        bypass=bypass_cache,
+        cacheable=cacheable,
+        # Quien espera una descarga ajena también ve avanzar las páginas
+        progress=progress
+    )
 
 import json
 
-def getDataFromFile(file_path, user):
-    grouped_projects = {}
-    duplicados = []
-    seen = set()
+def getDataFromFile(file_path, user, tracker_filter=None, project_filter=None):
+    aggregator = IssueAggregator(user, tracker_filter, project_filter)
 
     try:
-        with open(file_path, 'r') as file:
-            issues = json.load(file)
-
-        for issue in issues['issues']:
-            nombre_proyecto = issue['project']['name']
-            id_proyecto = issue['project']['id']
-            tracker_name = issue['tracker']['name']
-            issue_subject = issue['subject']
-
-            if tracker_name.startswith('P_'):
-                # Si el proyecto no existe aún, lo creamos
-                if id_proyecto not in grouped_projects:
-                    grouped_projects[id_proyecto] = {
-                        'worker_name': user,  
-                        'project_id': id_proyecto,
-                        'project_name': nombre_proyecto,
-                        'trackers': {}
-                    }
-
-                # Si el tracker_name no existe aún en este proyecto, lo creamos
-                if tracker_name not in grouped_projects[id_proyecto]['trackers']:
-                    grouped_projects[id_proyecto]['trackers'][tracker_name] = {
-                        'tracker_name': tracker_name,
-                        'subjects': []
-                    }
-
-                # Añadir el subject al tracker, si no está ya en la lista
-                if issue_subject not in grouped_projects[id_proyecto]['trackers'][tracker_name]['subjects']:
-                    grouped_projects[id_proyecto]['trackers'][tracker_name]['subjects'].append(issue_subject)
-
-                # Comprobación de duplicados
-                if tracker_name in seen:
-                    duplicados.append(tracker_name)
-                else:
-                    seen.add(tracker_name)
+        # Lectura en streaming: una issue (reducida) cada vez, sea JSON o snapshot JSONL
+        aggregator.addIssues(iterFileIssues(file_path))
 
     except FileNotFoundError:
         return {'error': f"Archivo no encontrado: {file_path}"}
@@ -124,17 +276,4 @@ def getDataFromFile(file_path, user):
     except Exception as err:
         return {'error': f"Error inesperado: {err}"}
 
-    all_trackers = [
-        {
-            'worker_name': project['worker_name'],  
-            'project_id': project['project_id'],
-            'project_name': project['project_name'],
-            'trackers': [
-                {
-                    'tracker_name': tracker['tracker_name'],
-                    'subjects': tracker['subjects']
-                } for tracker in project['trackers'].values()
-            ]
-        } for project in grouped_projects.values()
-    ]
-    return all_trackers
+    return aggregator.result()
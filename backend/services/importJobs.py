@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, update
+
+from configs.database import db
+from configs.models import ImportJob
+from services.importProject import importFromRedmine
+from services.metrics import finishMetrics, startMetrics
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+
+
+class ImportQueueFull(Exception):
+    pass
+
+
+class ImportProgress:
+    # Progreso de un trabajo. Se actualiza desde los hilos de descarga, por eso usa su
+    # propio lock y escribe en import_jobs con una conexión aparte de la transacción de
+    # la importación, como mucho cada IMPORT_PROGRESS_INTERVAL segundos.
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.phase = 'queued'
+        self.pages_fetched = 0
+        self.total_pages = None
+        self.rows_written = 0
+        self._engine = db.engine
+        # Se escribe desde hilos sin contexto de aplicación: el intervalo se lee aquí
+        self._interval = current_app.config['IMPORT_PROGRESS_INTERVAL']
+        self._lock = threading.Lock()
+        self._last_flush = 0
+
+    def setPhase(self, phase):
+        with self._lock:
+            self.phase = phase
+        self.flush(force=True)
+
+    def pageFetched(self, total_pages=None):
+        with self._lock:
+            self.pages_fetched += 1
+            if total_pages is not None:
+                self.total_pages = total_pages
+        self.flush()
+
+    def addPages(self, count, total_pages=None):
+        # Páginas ya descargadas por una descarga compartida a la que se une el trabajo
+        with self._lock:
+            self.pages_fetched += count
+            if total_pages is not None:
+                self.total_pages = total_pages
+        self.flush()
+
+    def rowsWritten(self, count):
+        with self._lock:
+            self.rows_written += max(count, 0)
+        self.flush()
+
+    def flush(self, force=False, final=False, **values):
+        # Las escrituras intermedias son informativas: un error (p. ej. "database is locked")
+        # se registra y no interrumpe la importación. Solo la del estado final (final=True)
+        # propaga el error.
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_flush < self._interval:
+                return
+            self._last_flush = now
+            values.update(
+                phase=self.phase,
+                pages_fetched=self.pages_fetched,
+                total_pages=self.total_pages,
+                rows_written=self.rows_written
+            )
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(update(ImportJob).where(ImportJob.id == self.job_id).values(**values))
+        except Exception:
+            if final:
+                raise
+            logger.warning("No se pudo guardar el progreso del trabajo %s", self.job_id, exc_info=True)
+
+
+def _getExecutor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config['IMPORT_WORKERS'], thread_name_prefix='import')
+        return _executor
+
+
+def _runJob(app, job_id, url, user, password, incremental, redmine_project_id, import_options):
+    global _pending
+    try:
+        with app.app_context():
+            job_metrics, metrics_token = startMetrics('import_job')
+            progress = ImportProgress(job_id)
+            progress.flush(force=True, started_at=datetime.utcnow())
+            try:
+                result = importFromRedmine(url, user, password, incremental, redmine_project_id, progress, **import_options)
+                # Algunos proyectos pueden fallar aunque otros se importen: se indica en el mensaje
+                failed = [summary for summary in result.get('projects', []) if not summary['success']]
+                message = (
+                    f"{len(failed)} de {len(result['projects'])} proyectos fallaron: "
+                    + '; '.join(f"{summary['project_name']}: {summary.get('message')}" for summary in failed)
+                ) if failed else None
+                progress.phase = 'done'
+                progress.flush(force=True, final=True, result=result, message=message, finished_at=datetime.utcnow())
+            except Exception as e:
+                logger.exception("Error en el trabajo de importación %s", job_id)
+                db.session.rollback()
+                progress.phase = 'failed'
+                progress.flush(force=True, final=True, message=str(e), finished_at=datetime.utcnow())
+            finally:
+                finishMetrics(job_metrics, metrics_token)
+                db.session.remove()
+    finally:
+        with _executor_lock:
+            _pending -= 1
+
+
+def submitImportJob(app, url, user, password, incremental=False, redmine_project_id=None, save_snapshot=False,
+                    force=False, refresh=False):
+    # Registra el trabajo y lo encola en el pool acotado del proceso.
+    # Las credenciales solo viajan en memoria, nunca se guardan en la base de datos.
+    # Con save_snapshot el nombre del snapshot se devuelve en el resultado del trabajo.
+    import_options = {'save_snapshot': save_snapshot, 'force': force, 'refresh': refresh}
+    global _pending
+    with _executor_lock:
+        if _pending >= current_app.config['IMPORT_MAX_PENDING']:
+            raise ImportQueueFull('Demasiadas importaciones en curso, inténtalo más tarde')
+        _pending += 1
+
+    job_id = str(uuid.uuid4())
+    try:
+        db.session.add(ImportJob(id=job_id, redmine_url=url, worker_name=user, phase='queued'))
+        db.session.commit()
+        _getExecutor().submit(_runJob, app, job_id, url, user, password, incremental, redmine_project_id, import_options)
+    except Exception:
+        db.session.rollback()
+        with _executor_lock:
+            _pending -= 1
+        raise
+    return job_id
+
+
+UNFINISHED_PHASES = ('queued', 'fetching', 'importing')
+
+
+def failStaleJobs(job_id=None):
+    # Los trabajos se ejecutan dentro del proceso: si el worker muere (reinicio, despliegue,
+    # max_requests) la fila se queda sin terminar. Se marcan como fallidos los que llevan
+    # más de IMPORT_JOB_TIMEOUT segundos sin acabar. Devuelve el número de trabajos marcados.
+    now = datetime.utcnow()
+    stmt = (
+        update(ImportJob)
+        .where(
+            ImportJob.phase.in_(UNFINISHED_PHASES),
+            func.coalesce(ImportJob.started_at, ImportJob.created_at) < now - timedelta(seconds=current_app.config['IMPORT_JOB_TIMEOUT'])
+        )
+        .values(phase='failed', message='Trabajo interrumpido (sin terminar tras IMPORT_JOB_TIMEOUT)', finished_at=now)
+    )
+    if job_id is not None:
+        stmt = stmt.where(ImportJob.id == job_id)
+    count = db.session.execute(stmt).rowcount
+    db.session.commit()
+    if count:
+        logger.warning("%d trabajos de importación interrumpidos marcados como fallidos", count)
+    return count
+
+
+def serializeJob(job, include_result=False):
+    end = job.finished_at or datetime.utcnow()
+    start = job.started_at or job.created_at
+    payload = {
+        'job_id': job.id,
+        'phase': job.phase,
+        'pages_fetched': job.pages_fetched,
+        'total_pages': job.total_pages,
+        'rows_written': job.rows_written,
+        'elapsed_seconds': round((end - start).total_seconds(), 3) if start else None,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+    if include_result:
+        payload['result'] = job.result
+    return payload
@@ -0,0 +1,392 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+
+from configs.database import db, upsertInsert
+from configs.models import (
+    Project,
+    Worker,
+    Subtracker,
+    DeviceSubtracker,
+    ImportFingerprint,
+    Response
+)
+from services.getTracketsProject import getDataFromFile, getDataProjectShared, getVisibleProjectIds
+from services.metrics import currentMetrics, resetMetrics, useMetrics
+from services.questionCatalog import getCatalog
+from services.responseSummary import SUMMARY_KEY, addToSummary, summaryDeltas
+from services.syncState import ALL_PROJECTS, getSyncCursor, saveSyncCursor
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidProjectData(ValueError):
+    pass
+
+
+class ProjectsImportFailed(Exception):
+    # Ningún proyecto pudo importarse; summaries lleva el error de cada uno
+    def __init__(self, summaries):
+        super().__init__('; '.join(f"{s['project_name']}: {s.get('message')}" for s in summaries))
+        self.summaries = summaries
+
+
+# Filas por sentencia INSERT (evita sentencias gigantes en proyectos muy grandes)
+BATCH_SIZE = 5000
+# Límite de parámetros por sentencia (SQLite admite 32766, PostgreSQL 65535)
+MAX_BIND_PARAMS = 32000
+
+
+def _chunks(rows, size=BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _upsertByName(model, name):
+    # INSERT ... ON CONFLICT (name) DO NOTHING y, si ya existía, SELECT del id.
+    # A diferencia de DO UPDATE no bloquea la fila existente hasta el commit, así que
+    # varias importaciones que comparten trabajador no se serializan.
+    stmt = upsertInsert(model).values(name=name).on_conflict_do_nothing(index_elements=['name'])
+    inserted_id = db.session.execute(stmt.returning(model.id)).scalar()
+    if inserted_id is not None:
+        return inserted_id
+    return db.session.execute(select(model.id).where(model.name == name)).scalar_one()
+
+
+def _insertIgnore(model, rows, index_elements, progress=None, returning=None):
+    # Devuelve las filas realmente insertadas cuando se pide returning
+    inserted = []
+    if not rows:
+        return inserted
+    # +1 por las columnas con valor por defecto (created_at) que añade SQLAlchemy
+    size = min(BATCH_SIZE, MAX_BIND_PARAMS // (len(rows[0]) + 1))
+    for chunk in _chunks(rows, size):
+        stmt = upsertInsert(model).values(chunk).on_conflict_do_nothing(index_elements=index_elements)
+        if returning:
+            chunk_inserted = db.session.execute(stmt.returning(*returning)).mappings().all()
+            inserted.extend(chunk_inserted)
+            rowcount = len(chunk_inserted)
+        else:
+            rowcount = db.session.execute(stmt).rowcount
+        if progress:
+            progress.rowsWritten(rowcount)
+        request_metrics = currentMetrics()
+        if request_metrics:
+            request_metrics.addRows(rowcount)
+        logger.debug("%s: %d filas enviadas, %d insertadas", model.__tablename__, len(chunk), rowcount)
+    return inserted
+
+
+def trackerFingerprint(device, subjects):
+    # Huella estable de un subárbol: dispositivo, preguntas del dispositivo y conjunto de subjects
+    content = [device['id'], sorted(device['question_ids']), sorted(set(subjects))]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def importProjectData(project, redmine_url=None, progress=None, force=False, partial=False):
+    # Importa un proyecto agrupado por getDataProject en una única transacción:
+    # primero se calcula en memoria el conjunto completo de filas y luego se escribe
+    # con INSERT ... ON CONFLICT por lotes, en lugar de una consulta + commit por fila.
+    # Los trackers cuya huella coincide con la de la última importación no se escriben
+    # (force=True fuerza la escritura de todos). partial=True indica que los subjects son solo
+    # una parte del tracker (sincronización incremental): entonces no se guardan huellas.
+    project_name = project.get('project_name')
+    worker_name = project.get('worker_name')
+    trackers = project.get('trackers', [])
+
+    if not project_name or not worker_name:
+        raise ValueError("Faltan datos obligatorios: project_name o worker_name")
+
+    try:
+        project_id = _upsertByName(Project, project_name)
+        worker_id = _upsertByName(Worker, worker_name)
+
+        # Dispositivos y preguntas salen de la caché del catálogo
+        devices = getCatalog()['by_name']
+
+        # Huellas de la última importación de este proyecto y trabajador (una consulta)
+        stored_fingerprints = {} if force else dict(db.session.execute(
+            select(ImportFingerprint.device_id, ImportFingerprint.fingerprint)
+            .where(ImportFingerprint.project_id == project_id, ImportFingerprint.worker_id == worker_id)
+        ).all())
+        changed = {}
+        for tracker in trackers:
+            device = devices.get(tracker.get('tracker_name'))
+            if device:
+                fingerprint = trackerFingerprint(device, tracker.get('subjects', []))
+                if stored_fingerprints.get(device['id']) != fingerprint:
+                    changed[tracker['tracker_name']] = fingerprint
+
+        # Subtrackers: inserta los que falten y recupera los ids en bloque
+        subject_names = list(dict.fromkeys(
+            subject
+            for tracker in trackers if tracker.get('tracker_name') in changed
+            for subject in tracker.get('subjects', [])
+        ))
+        _insertIgnore(
+            Subtracker,
+            [{'project_id': project_id, 'name': name} for name in subject_names],
+            ['project_id', 'name'],
+            progress
+        )
+        subtracker_ids = {}
+        for chunk in _chunks(subject_names):
+            subtracker_ids.update(db.session.execute(
+                select(Subtracker.name, Subtracker.id)
+                .where(Subtracker.project_id == project_id, Subtracker.name.in_(chunk))
+            ).all())
+
+        device_subtracker_rows = {}
+        response_rows = []
+        tracker_results = []
+
+        for tracker in trackers:
+            tracker_name = tracker.get('tracker_name')
+            device = devices.get(tracker_name)
+            if not device:
+                continue
+
+            device_id = device['id']
+            tracker_info = {'tracker_name': tracker_name, 'subjects': []}
+            question_ids = device['question_ids']
+            write = tracker_name in changed
+
+            for subject in tracker.get('subjects', []):
+                questions = {'tracker_name': subject, 'subjects': device['question_blocks']}
+                tracker_info['subjects'].append({'subject': subject, 'questions': questions})
+                if not write:
+                    continue
+
+                subtracker_id = subtracker_ids[subject]
+                device_subtracker_rows[(device_id, subtracker_id)] = {
+                    'device_id': device_id,
+                    'subtracker_id': subtracker_id
+                }
+                for question_id in question_ids:
+                    response_rows.append({
+                        'subtracker_id': subtracker_id,
+                        'device_id': device_id,
+                        'question_id': question_id,
+                        'project_id': project_id,
+                        'worker_id': worker_id,
+                        'status': 'pending'
+                    })
+
+            tracker_results.append(tracker_info)
+
+        _insertIgnore(DeviceSubtracker, list(device_subtracker_rows.values()), ['device_id', 'subtracker_id'], progress)
+        inserted_responses = _insertIgnore(
+            Response,
+            response_rows,
+            ['subtracker_id', 'device_id', 'question_id', 'project_id', 'worker_id'],
+            progress,
+            returning=[getattr(Response, column) for column in SUMMARY_KEY]
+        )
+        # El resumen de progreso se actualiza en la misma transacción
+        addToSummary(summaryDeltas(inserted_responses))
+
+        # Las huellas se guardan en la misma transacción que los datos que representan
+        if changed and not partial:
+            now = datetime.utcnow()
+            fingerprint_rows = [
+                {
+                    'project_id': project_id,
+                    'device_id': devices[tracker['tracker_name']]['id'],
+                    'worker_id': worker_id,
+                    'fingerprint': changed[tracker['tracker_name']],
+                    'subjects': len(tracker.get('subjects', [])),
+                    'updated_at': now
+                } for tracker in trackers if tracker.get('tracker_name') in changed
+            ]
+            stmt = upsertInsert(ImportFingerprint).values(fingerprint_rows)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['project_id', 'device_id', 'worker_id'],
+                set_={
+                    'fingerprint': stmt.excluded.fingerprint,
+                    'subjects': stmt.excluded.subjects,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            ))
+
+        # El cursor de sincronización avanza en la misma transacción que los datos
+        if redmine_url and project.get('last_updated_on') and project.get('project_id') is not None:
+            saveSyncCursor(redmine_url, project['project_id'], worker_id, project['last_updated_on'], project_id=project_id)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    trackers_skipped = len(tracker_results) - len(changed)
+    logger.info(
+        "Importado proyecto %s: %d subjects, %d respuestas calculadas, %d trackers sin cambios",
+        project_name, len(subject_names), len(response_rows), trackers_skipped
+    )
+    return {
+        'project_name': project_name,
+        'worker_name': worker_name,
+        'trackers': tracker_results,
+        'responses_created': len(inserted_responses),
+        'trackers_skipped': trackers_skipped
+    }
+
+
+def snapshotPath(snapshot_name):
+    # Los snapshots solo se leen y escriben dentro de SNAPSHOT_DIR
+    return os.path.join(current_app.config['SNAPSHOT_DIR'], os.path.basename(snapshot_name))
+
+
+def importFromRedmine(url, user, password, incremental=False, redmine_project_id=None, progress=None,
+                      save_snapshot=False, force=False, refresh=False):
+    # Descarga de Redmine + importación; la usan tanto POST /data como los trabajos asíncronos
+    snapshot_name = None
+    if save_snapshot:
+        os.makedirs(current_app.config['SNAPSHOT_DIR'], exist_ok=True)
+        snapshot_name = f"{datetime.utcnow():%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}.jsonl.gz"
+
+    # Sin proyecto se guardan los proyectos visibles, para detectar en la siguiente sincronización
+    # incremental los que aparezcan (sus issues pueden ser anteriores al cursor)
+    visible_projects = None if redmine_project_id else getVisibleProjectIds(url, user, password)
+    # En modo incremental solo se piden las issues modificadas desde el último cursor de este trabajador
+    since = None
+    if incremental:
+        worker_id = db.session.execute(select(Worker.id).where(Worker.name == user)).scalar()
+        since = getSyncCursor(url, worker_id, redmine_project_id, visible_projects)
+
+    if progress:
+        progress.setPhase('fetching')
+    # Las importaciones simultáneas de lo mismo comparten una sola descarga (refresh la fuerza)
+    project_data = getDataProjectShared(
+        url, user, password,
+        updated_since=since,
+        project_id=redmine_project_id,
+        progress=progress,
+        snapshot_path=snapshotPath(snapshot_name) if snapshot_name else None,
+        bypass_cache=refresh
+    )
+    if since and project_data == []:
+        return {'incremental': True, 'since': since.isoformat(), 'trackers': []}
+    if not project_data or not isinstance(project_data, list):
+        raise InvalidProjectData('Datos del proyecto no válidos')
+
+    if progress:
+        progress.setPhase('importing')
+    # Con cursor solo llegan las issues modificadas: el conjunto de subjects es parcial
+    result = importProjects(project_data, redmine_url=url, progress=progress, force=force, partial=since is not None)
+    if visible_projects is not None and all(summary['success'] for summary in result['projects']):
+        _saveAllProjectsCursor(url, user, project_data, visible_projects)
+    if incremental:
+        result.update({'incremental': True, 'since': since.isoformat() if since else None})
+    if snapshot_name:
+        result['snapshot'] = snapshot_name
+    return result
+
+
+def _saveAllProjectsCursor(url, worker_name, project_data, visible_projects):
+    # Cursor de las descargas de todos los proyectos. Solo se guarda si todos los proyectos
+    # se importaron: si no, las issues del que falló se saltarían en la siguiente sincronización
+    updated = [project['last_updated_on'] for project in project_data if project.get('last_updated_on')]
+    if not updated:
+        return
+    try:
+        worker_id = db.session.execute(select(Worker.id).where(Worker.name == worker_name)).scalar_one()
+        saveSyncCursor(url, ALL_PROJECTS, worker_id, max(updated), visible_projects=visible_projects)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def importFromSnapshot(snapshot_name, user, progress=None):
+    # Repite una importación a partir de un snapshot guardado, sin llamar a Redmine.
+    # No avanza los cursores de sincronización.
+    project_data = getDataFromFile(snapshotPath(snapshot_name), user)
+    if not isinstance(project_data, list):
+        raise InvalidProjectData(project_data.get('error', 'Datos del proyecto no válidos'))
+    if not project_data:
+        raise InvalidProjectData('El snapshot no contiene proyectos que importar')
+
+    if progress:
+        progress.setPhase('importing')
+    return importProjects(project_data, progress=progress)
+
+
+def _projectSummary(project, result=None, error=None, elapsed=0.0):
+    summary = {
+        'project_id': project.get('project_id'),
+        'project_name': project.get('project_name'),
+        'success': error is None,
+        'elapsed_seconds': round(elapsed, 3)
+    }
+    if error is not None:
+        summary['message'] = str(error)
+    else:
+        summary.update({
+            'trackers': len(result['trackers']),
+            'subjects': sum(len(tracker['subjects']) for tracker in result['trackers']),
+            'responses_created': result['responses_created'],
+            'duplicate_subjects': project.get('duplicate_subjects', 0),
+            'trackers_skipped': result['trackers_skipped']
+        })
+    return summary
+
+
+def _importOne(app, project, redmine_url, progress, request_metrics, force=False, partial=False):
+    # Cada proyecto en su propio contexto de aplicación: sesión y transacción propias,
+    # de modo que un proyecto con errores no deshace los demás
+    with app.app_context():
+        token = useMetrics(request_metrics)
+        start = time.perf_counter()
+        try:
+            result = importProjectData(project, redmine_url=redmine_url, progress=progress, force=force, partial=partial)
+            return result, _projectSummary(project, result, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            logger.exception("Error importando el proyecto %s", project.get('project_name'))
+            return None, _projectSummary(project, error=e, elapsed=time.perf_counter() - start)
+        finally:
+            resetMetrics(token)
+            db.session.remove()
+
+
+def importProjects(projects, redmine_url=None, progress=None, force=False, partial=False):
+    # Importa todos los proyectos devueltos por Redmine repartidos en un pool acotado.
+    # El resultado conserva el formato de un proyecto (el primero importado con éxito)
+    # y añade 'projects' con el resumen de cada uno.
+    worker_names = {project.get('worker_name') for project in projects if project.get('worker_name')}
+    try:
+        # El trabajador se crea antes para que las transacciones de los proyectos no esperen entre sí
+        for worker_name in worker_names:
+            _upsertByName(Worker, worker_name)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    app = current_app._get_current_object()
+    request_metrics = currentMetrics()
+    concurrency = min(len(projects), current_app.config['IMPORT_PROJECT_CONCURRENCY'])
+    if concurrency <= 1:
+        outcomes = [
+            _importOne(app, project, redmine_url, progress, request_metrics, force, partial) for project in projects
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='import-project') as executor:
+            outcomes = list(executor.map(
+                lambda project: _importOne(app, project, redmine_url, progress, request_metrics, force, partial),
+                projects
+            ))
+
+    summaries = [summary for _, summary in outcomes]
+    imported = [result for result, _ in outcomes if result is not None]
+    if not imported:
+        raise ProjectsImportFailed(summaries)
+
+    return {**imported[0], 'projects': summaries}
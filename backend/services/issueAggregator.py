@@ -0,0 +1,102 @@
+import logging
+
+from flask import current_app
+
+from services.syncState import parseRedmineDate
+
+logger = logging.getLogger(__name__)
+
+
+def trackerPrefixFilter(prefix=None):
+    # Filtro por defecto: solo los trackers cuyo nombre empieza por REDMINE_TRACKER_PREFIX
+    prefix = current_app.config['REDMINE_TRACKER_PREFIX'] if prefix is None else prefix
+    return lambda tracker_name: tracker_name.startswith(prefix)
+
+
+class IssueAggregator:
+    # Agrupa issues de Redmine por proyecto y tracker, página a página.
+    # Los subjects de cada tracker se guardan en un dict (conjunto con orden de inserción),
+    # así la comprobación de duplicados es O(1) y el coste total es lineal en el número de issues.
+    #   tracker_filter(tracker_name) -> bool
+    #   project_filter(project_id, project_name) -> bool (None = todos los proyectos)
+    def __init__(self, user, tracker_filter=None, project_filter=None):
+        self.user = user
+        self.tracker_filter = tracker_filter or trackerPrefixFilter()
+        self.project_filter = project_filter
+        self.projects = {}
+        self.stats = {
+            'issues': 0,
+            'accepted': 0,
+            'skipped_tracker': 0,
+            'skipped_project': 0,
+            'duplicate_subjects': 0
+        }
+
+    def addIssue(self, issue):
+        self.stats['issues'] += 1
+        tracker_name = issue['tracker']['name']
+        if not self.tracker_filter(tracker_name):
+            self.stats['skipped_tracker'] += 1
+            return
+
+        id_proyecto = issue['project']['id']
+        nombre_proyecto = issue['project']['name']
+        if self.project_filter and not self.project_filter(id_proyecto, nombre_proyecto):
+            self.stats['skipped_project'] += 1
+            return
+        self.stats['accepted'] += 1
+
+        project = self.projects.get(id_proyecto)
+        if project is None:
+            project = self.projects[id_proyecto] = {
+                'project_id': id_proyecto,
+                'project_name': nombre_proyecto,
+                'last_updated_on': None,
+                'duplicate_subjects': 0,
+                'trackers': {}
+            }
+
+        # Mayor updated_on visto: será el cursor de la próxima sincronización
+        updated_on = parseRedmineDate(issue.get('updated_on'))
+        if updated_on and (project['last_updated_on'] is None or updated_on > project['last_updated_on']):
+            project['last_updated_on'] = updated_on
+
+        subjects = project['trackers'].setdefault(tracker_name, {})
+        issue_subject = issue['subject']
+        if issue_subject in subjects:
+            # Varias issues con el mismo subject en un tracker dan un único subtracker
+            project['duplicate_subjects'] += 1
+            self.stats['duplicate_subjects'] += 1
+        else:
+            subjects[issue_subject] = None
+
+    def addIssues(self, issues):
+        for issue in issues:
+            self.addIssue(issue)
+
+    def addPage(self, page):
+        # Página cruda de /issues.json
+        self.addIssues(page.get('issues', []))
+
+    def result(self):
+        # Formato que consume importProjects
+        if self.stats['duplicate_subjects']:
+            logger.info(
+                "Agrupadas %d issues (%d aceptadas), %d subjects duplicados",
+                self.stats['issues'], self.stats['accepted'], self.stats['duplicate_subjects']
+            )
+        return [
+            {
+                'worker_name': self.user,
+                'project_id': project['project_id'],
+                'project_name': project['project_name'],
+                'last_updated_on': project['last_updated_on'],
+                'duplicate_subjects': project['duplicate_subjects'],
+                'trackers': [
+                    {
+                        'tracker_name': tracker_name,
+                        'subjects': list(subjects)
+                    } for tracker_name, subjects in project['trackers'].items()
+                ]
+            } for project in self.projects.values()
+        ]
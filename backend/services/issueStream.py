@@ -0,0 +1,130 @@
+import gzip
+import json
+import re
+
+# Lectura en streaming de volcados de issues de Redmine y de snapshots de páginas.
+#  - Documento JSON ({"issues": [...]}, como salida.json): se decodifica un elemento de
+#    "issues" cada vez, sin cargar el fichero entero.
+#  - Snapshot JSONL (.jsonl o .jsonl.gz): una página cruda de /issues.json por línea,
+#    tal como la guarda getDataProject con snapshot_path.
+# En ambos casos solo se conservan los campos que usa la agrupación (slimIssue).
+
+CHUNK_SIZE = 1024 * 1024
+ISSUES_ARRAY = re.compile(r'"issues"\s*:\s*\[')
+
+
+def slimIssue(issue):
+    # Descarta description, custom_fields, etc.
+    return {
+        'project': {'id': issue['project']['id'], 'name': issue['project']['name']},
+        'tracker': {'id': issue['tracker']['id'], 'name': issue['tracker']['name']},
+        'subject': issue['subject'],
+        'updated_on': issue.get('updated_on')
+    }
+
+
+def isSnapshot(file_path):
+    return file_path.endswith('.jsonl') or file_path.endswith('.jsonl.gz')
+
+
+def _openText(file_path, mode='rt'):
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode, encoding='utf-8')
+    return open(file_path, mode, encoding='utf-8')
+
+
+def iterJsonArrayIssues(file):
+    # Decodifica uno a uno los elementos del array "issues" de un documento JSON
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+
+    def readMore():
+        nonlocal buffer, eof
+        chunk = file.read(CHUNK_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    match = None
+    while match is None:
+        match = ISSUES_ARRAY.search(buffer)
+        if match is None:
+            if eof:
+                raise json.JSONDecodeError('No se encontró el array "issues"', buffer, 0)
+            # Se conserva el final por si la clave quedó partida entre dos bloques
+            buffer = buffer[-32:]
+            readMore()
+    position = match.end()
+
+    while True:
+        # Saltar espacios y comas entre elementos
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            readMore()
+        if position >= len(buffer):
+            raise json.JSONDecodeError('Array "issues" sin cerrar', buffer, position)
+        if buffer[position] == ']':
+            return
+
+        try:
+            issue, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Elemento incompleto: se descarta lo ya consumido y se lee otro bloque
+            buffer = buffer[position:]
+            position = 0
+            readMore()
+            continue
+
+        yield issue
+        position = end
+        if position > CHUNK_SIZE:
+            buffer = buffer[position:]
+            position = 0
+
+
+def iterSnapshotPages(file_path):
+    with _openText(file_path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iterFileIssues(file_path):
+    # Issues reducidas de un volcado JSON o de un snapshot JSONL, con memoria constante
+    if isSnapshot(file_path):
+        for page in iterSnapshotPages(file_path):
+            for issue in page.get('issues', []):
+                yield slimIssue(issue)
+    else:
+        with _openText(file_path) as file:
+            for issue in iterJsonArrayIssues(file):
+                yield slimIssue(issue)
+
+
+class SnapshotWriter:
+    # Guarda páginas crudas de /issues.json, una por línea, en un JSONL (gzip si acaba en .gz)
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.pages = 0
+        self._file = _openText(file_path, 'wt')
+
+    def write(self, page):
+        self._file.write(json.dumps(page, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+        self.pages += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,116 @@
+import contextvars
+import os
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+
+# Métricas por petición (SQL, Redmine, filas escritas) agregadas en histogramas de Prometheus.
+# Con varios workers de gunicorn hay que definir PROMETHEUS_MULTIPROC_DIR (lo hace la imagen
+# Docker): cada worker escribe sus valores en ese directorio y /metrics devuelve la suma de
+# todos, sea cual sea el worker que atiende el scrape.
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.http_pages = 0
+        self.http_seconds = 0.0
+        self.rows_upserted = 0
+        # Las páginas de Redmine se registran desde los hilos de descarga
+        self._lock = threading.Lock()
+
+    def addSql(self, seconds):
+        with self._lock:
+            self.sql_statements += 1
+            self.sql_seconds += seconds
+
+    def addHttp(self, seconds, pages=1):
+        with self._lock:
+            self.http_pages += pages
+            self.http_seconds += seconds
+
+    def addRows(self, count):
+        with self._lock:
+            self.rows_upserted += max(count, 0)
+
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+HISTOGRAMS = {
+    'duration': Histogram('validacion_request_duration_seconds', 'Duración de la petición', ['endpoint'], buckets=SECONDS_BUCKETS),
+    'sql_statements': Histogram('validacion_request_sql_statements', 'Sentencias SQL por petición', ['endpoint'], buckets=COUNT_BUCKETS),
+    'sql_seconds': Histogram('validacion_request_db_seconds', 'Tiempo en base de datos por petición', ['endpoint'], buckets=SECONDS_BUCKETS),
+    'http_pages': Histogram('validacion_request_redmine_pages', 'Páginas de Redmine descargadas por petición', ['endpoint'], buckets=COUNT_BUCKETS),
+    'http_seconds': Histogram('validacion_request_redmine_seconds', 'Tiempo de descarga de Redmine por petición', ['endpoint'], buckets=SECONDS_BUCKETS),
+    'rows_upserted': Histogram('validacion_request_rows_upserted', 'Filas insertadas por petición', ['endpoint'], buckets=COUNT_BUCKETS),
+}
+
+
+def currentMetrics():
+    return _current.get()
+
+
+def startMetrics(endpoint):
+    metrics = RequestMetrics(endpoint)
+    return metrics, _current.set(metrics)
+
+
+def useMetrics(metrics):
+    # Propaga las métricas de la petición a otro hilo (los contextvars no se heredan)
+    return _current.set(metrics)
+
+
+def resetMetrics(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        _current.set(None)
+
+
+def finishMetrics(metrics, token):
+    resetMetrics(token)
+    endpoint = metrics.endpoint or 'unknown'
+    HISTOGRAMS['duration'].labels(endpoint).observe(time.perf_counter() - metrics.started)
+    HISTOGRAMS['sql_statements'].labels(endpoint).observe(metrics.sql_statements)
+    HISTOGRAMS['sql_seconds'].labels(endpoint).observe(metrics.sql_seconds)
+    HISTOGRAMS['http_pages'].labels(endpoint).observe(metrics.http_pages)
+    HISTOGRAMS['http_seconds'].labels(endpoint).observe(metrics.http_seconds)
+    HISTOGRAMS['rows_upserted'].labels(endpoint).observe(metrics.rows_upserted)
+
+
+def renderMetrics():
+    # Devuelve (cuerpo, content type). En modo multiproceso se agregan los ficheros de todos los workers
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _beforeCursorExecute(conn, cursor, statement, parameters, context, executemany):
+    # El instante se guarda en el contexto de ejecución (uno por sentencia), no en la
+    # conexión: si la sentencia falla no queda nada pendiente en la conexión del pool
+    if _current.get() is not None and context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _afterCursorExecute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current.get()
+    start = getattr(context, '_metrics_start', None)
+    if metrics is not None and start is not None:
+        metrics.addSql(time.perf_counter() - start)
+
+
+def instrumentEngine(engine):
+    if not event.contains(engine, 'before_cursor_execute', _beforeCursorExecute):
+        event.listen(engine, 'before_cursor_execute', _beforeCursorExecute)
+        event.listen(engine, 'after_cursor_execute', _afterCursorExecute)
@@ -0,0 +1,88 @@
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from configs.database import db
+from configs.models import Project, Response, Subtracker
+from services.questionCatalog import getDeviceById
+
+
+def getProjectTree(project_id, after=None, limit=None, worker_id=None):
+    # Árbol subtrackers -> dispositivos -> respuestas -> preguntas de un proyecto, paginado
+    # por id de subtracker (keyset: WHERE id > after ORDER BY id LIMIT n), así cada página
+    # cuesta lo mismo sea cual sea su posición. Número de consultas fijo por página:
+    #   1. el proyecto
+    #   2. la página de subtrackers
+    #   3. sus respuestas con la pregunta (selectinload + joinedload)
+    # Los nombres de dispositivo salen de la caché del catálogo. raiseload evita que
+    # cualquier otra relación perezosa lance consultas sin que se note.
+    # Devuelve None si el proyecto no existe.
+    limit = min(limit or current_app.config['PROJECT_TREE_PAGE_SIZE'], current_app.config['PROJECT_TREE_MAX_PAGE_SIZE'])
+
+    project = db.session.get(Project, project_id, options=[raiseload('*')])
+    if project is None:
+        return None
+
+    responses = Subtracker.responses
+    if worker_id is not None:
+        responses = responses.and_(Response.worker_id == worker_id)
+
+    stmt = (
+        select(Subtracker)
+        .where(Subtracker.project_id == project_id)
+        .order_by(Subtracker.id)
+        .limit(limit + 1)
+        .options(
+            selectinload(responses).options(
+                joinedload(Response.question).raiseload('*'),
+                raiseload('*')
+            ),
+            raiseload('*')
+        )
+    )
+    if after is not None:
+        stmt = stmt.where(Subtracker.id > after)
+
+    subtrackers = db.session.execute(stmt).scalars().all()
+    has_more = len(subtrackers) > limit
+    subtrackers = subtrackers[:limit]
+
+    return {
+        'project_id': project.id,
+        'project_name': project.name,
+        'subtrackers': [_serializeSubtracker(subtracker) for subtracker in subtrackers],
+        # Cursor de la siguiente página (None en la última)
+        'next_after': subtrackers[-1].id if has_more else None
+    }
+
+
+def _serializeSubtracker(subtracker):
+    devices = {}
+    for response in sorted(subtracker.responses, key=lambda r: (r.device_id, r.question_id or 0, r.id)):
+        device = devices.get(response.device_id)
+        if device is None:
+            catalog_device = getDeviceById(response.device_id)
+            device = devices[response.device_id] = {
+                'device_id': response.device_id,
+                'device_name': catalog_device['name'] if catalog_device else None,
+                'responses': []
+            }
+
+        question = response.question
+        device['responses'].append({
+            'id': response.id,
+            'version': response.version,
+            'worker_id': response.worker_id,
+            'status': response.status,
+            'response_text': response.response_text,
+            'comments': response.comments,
+            'responsable': response.responsable,
+            'question': {
+                'id': question.id,
+                'question_text': question.question_text,
+                'expected_result': question.expected_result,
+                'question_block_id': question.question_block_id
+            } if question else None
+        })
+
+    return {'id': subtracker.id, 'name': subtracker.name, 'devices': list(devices.values())}
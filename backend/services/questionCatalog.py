@@ -0,0 +1,124 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from configs.database import db
+from configs.models import (
+    Device,
+    Question,
+    QuestionBlock,
+    DeviceQuestionBlock
+)
+
+# Caché en proceso del catálogo Device -> QuestionBlock -> Question.
+# Es una instantánea inmutable que se sustituye entera al recargar, así que los lectores
+# no necesitan bloqueo. Se invalida al hacer commit de cambios en las tablas del catálogo
+# y, como red de seguridad frente a cambios hechos desde otro proceso, al expirar el TTL.
+CATALOG_MODELS = (Device, Question, QuestionBlock, DeviceQuestionBlock)
+
+_lock = threading.Lock()
+_version = 0
+_snapshot = None
+
+
+def invalidateCatalog():
+    global _version
+    with _lock:
+        _version += 1
+
+
+def _loadSnapshot(version):
+    # Una sola consulta para todo el catálogo
+    rows = db.session.execute(
+        select(
+            Device.id,
+            Device.name,
+            QuestionBlock.id,
+            QuestionBlock.name,
+            Question.id,
+            Question.question_text,
+            Question.expected_result
+        )
+        .select_from(Device)
+        .outerjoin(DeviceQuestionBlock, DeviceQuestionBlock.device_id == Device.id)
+        .outerjoin(QuestionBlock, QuestionBlock.id == DeviceQuestionBlock.question_block_id)
+        .outerjoin(Question, Question.question_block_id == QuestionBlock.id)
+        .order_by(Device.id, QuestionBlock.id, Question.id)
+    ).all()
+
+    by_id = {}
+    by_name = {}
+    blocks = {}
+    for device_id, device_name, block_id, block_name, question_id, question_text, expected_result in rows:
+        if device_id not in by_id:
+            by_id[device_id] = {'id': device_id, 'name': device_name, 'question_blocks': []}
+            # Con nombres repetidos se conserva el dispositivo de menor id
+            by_name.setdefault(device_name, by_id[device_id])
+        if question_id is None:
+            continue
+
+        key = (device_id, block_id)
+        if key not in blocks:
+            blocks[key] = {'question_block': block_name, 'questions': []}
+            by_id[device_id]['question_blocks'].append(blocks[key])
+        blocks[key]['questions'].append({
+            'id': question_id,
+            'question_text': question_text,
+            'expected_result': expected_result
+        })
+
+    for device in by_id.values():
+        device['question_ids'] = [q['id'] for block in device['question_blocks'] for q in block['questions']]
+
+    return {'version': version, 'loaded_at': time.monotonic(), 'by_id': by_id, 'by_name': by_name}
+
+
+def getCatalog():
+    # Devuelve la instantánea vigente, recargándola si está invalidada o caducada
+    global _snapshot
+    snapshot = _snapshot
+    if (
+        snapshot is None
+        or snapshot['version'] != _version
+        or time.monotonic() - snapshot['loaded_at'] > current_app.config['CATALOG_CACHE_TTL']
+    ):
+        with _lock:
+            snapshot = _snapshot
+            if (
+                snapshot is None
+                or snapshot['version'] != _version
+                or time.monotonic() - snapshot['loaded_at'] > current_app.config['CATALOG_CACHE_TTL']
+            ):
+                snapshot = _loadSnapshot(_version)
+                _snapshot = snapshot
+    return snapshot
+
+
+def getDeviceByName(name):
+    return getCatalog()['by_name'].get(name)
+
+
+def getDeviceById(device_id):
+    return getCatalog()['by_id'].get(device_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _markCatalogChanges(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info['catalog_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidateOnCommit(session):
+    if session.info.pop('catalog_changed', False):
+        invalidateCatalog()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discardOnRollback(session, previous_transaction):
+    session.info.pop('catalog_changed', None)
@@ -0,0 +1,129 @@
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+
+from configs.database import db
+from configs.models import Response
+from services.metrics import currentMetrics
+from services.responseSummary import SUMMARY_KEY, addToSummary
+
+ANSWER_FIELDS = ('response_text', 'status', 'comments', 'responsable')
+STATUS_MAX_LENGTH = 50
+
+responses_table = Response.__table__
+
+
+class InvalidAnswers(ValueError):
+    pass
+
+
+def _isInt(value):
+    # bool es subclase de int: True/False no son ids ni versiones válidos
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate(answer):
+    if not isinstance(answer, dict):
+        return 'Formato de respuesta no válido'
+    if not _isInt(answer.get('id')) or not _isInt(answer.get('version')):
+        return 'Faltan id o version'
+    # status es NOT NULL: si viene, tiene que ser un texto no vacío
+    if 'status' in answer:
+        status = answer['status']
+        if not isinstance(status, str) or not status or len(status) > STATUS_MAX_LENGTH:
+            return 'Estado no válido'
+    for field in ('response_text', 'comments', 'responsable'):
+        value = answer.get(field)
+        if value is not None and not isinstance(value, str):
+            return f'{field} debe ser texto'
+    return None
+
+
+def applyAnswers(answers, responsable=None):
+    # Aplica un lote de respuestas en una sola transacción:
+    #   1. SELECT ... FOR UPDATE de todas las filas del lote (bloquea y lee versión y estado)
+    #   2. un único UPDATE ejecutado como executemany para las que tienen la versión esperada
+    #   3. ajuste del resumen de progreso con los cambios de estado
+    # Devuelve un resultado por elemento: updated, conflict, not_found o invalid.
+    if not isinstance(answers, list) or not answers:
+        raise InvalidAnswers('Se esperaba una lista de respuestas')
+    max_batch = current_app.config['ANSWERS_MAX_BATCH']
+    if len(answers) > max_batch:
+        raise InvalidAnswers(f'Máximo {max_batch} respuestas por lote')
+
+    results = [None] * len(answers)
+    candidates = {}
+    for index, answer in enumerate(answers):
+        error = _validate(answer)
+        if error:
+            results[index] = {'id': answer.get('id') if isinstance(answer, dict) else None, 'result': 'invalid', 'message': error}
+        elif answer['id'] in candidates:
+            results[index] = {'id': answer['id'], 'result': 'invalid', 'message': 'Respuesta repetida en el lote'}
+        else:
+            candidates[answer['id']] = index
+
+    try:
+        current = {
+            row['id']: row for row in db.session.execute(
+                select(responses_table.c.id, responses_table.c.version, *(responses_table.c[f] for f in ANSWER_FIELDS),
+                       *(responses_table.c[k] for k in SUMMARY_KEY if k != 'status'))
+                .where(responses_table.c.id.in_(list(candidates)))
+                .order_by(responses_table.c.id)
+                .with_for_update()
+            ).mappings()
+        } if candidates else {}
+
+        now = datetime.utcnow()
+        params = []
+        deltas = Counter()
+        for response_id, index in candidates.items():
+            answer = answers[index]
+            row = current.get(response_id)
+            if row is None:
+                results[index] = {'id': response_id, 'result': 'not_found'}
+                continue
+            if row['version'] != answer['version']:
+                # Otro trabajador la modificó después de que este la leyera
+                results[index] = {'id': response_id, 'result': 'conflict', 'version': row['version']}
+                continue
+
+            values = {field: answer.get(field, row[field]) for field in ANSWER_FIELDS}
+            if responsable is not None and 'responsable' not in answer:
+                values['responsable'] = responsable
+            params.append({
+                'b_id': response_id,
+                'b_version': row['version'],
+                'b_updated_at': now,
+                **{f'b_{field}': value for field, value in values.items()}
+            })
+            results[index] = {'id': response_id, 'result': 'updated', 'version': row['version'] + 1}
+
+            if values['status'] != row['status']:
+                scope = tuple(row[k] for k in SUMMARY_KEY if k != 'status')
+                deltas[(*scope, row['status'])] -= 1
+                deltas[(*scope, values['status'])] += 1
+
+        if params:
+            stmt = (
+                update(responses_table)
+                .where(responses_table.c.id == bindparam('b_id'), responses_table.c.version == bindparam('b_version'))
+                .values(
+                    version=responses_table.c.version + 1,
+                    updated_at=bindparam('b_updated_at'),
+                    **{field: bindparam(f'b_{field}') for field in ANSWER_FIELDS}
+                )
+            )
+            db.session.execute(stmt, params)
+            addToSummary(deltas)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    request_metrics = currentMetrics()
+    if request_metrics:
+        request_metrics.addRows(len(params))
+    return results
@@ -0,0 +1,58 @@
+import csv
+import io
+
+from flask import current_app
+from sqlalchemy import select
+
+from configs.database import db
+from configs.models import Device, Question, Response, Subtracker, Worker
+
+EXPORT_COLUMNS = (
+    'response_id', 'subtracker', 'device', 'question_id', 'question_text', 'expected_result',
+    'worker', 'status', 'response_text', 'comments', 'responsable', 'updated_at'
+)
+
+
+def _exportQuery(project_id, worker_id=None):
+    # Consulta Core (sin objetos ORM) ordenada por la clave primaria: no necesita ordenar
+    # todo el proyecto antes de devolver la primera fila
+    stmt = (
+        select(
+            Response.id, Subtracker.name, Device.name, Question.id, Question.question_text,
+            Question.expected_result, Worker.name, Response.status, Response.response_text,
+            Response.comments, Response.responsable, Response.updated_at
+        )
+        .join(Subtracker, Subtracker.id == Response.subtracker_id)
+        .join(Device, Device.id == Response.device_id)
+        .outerjoin(Question, Question.id == Response.question_id)
+        .outerjoin(Worker, Worker.id == Response.worker_id)
+        .where(Response.project_id == project_id)
+        .order_by(Response.id)
+    )
+    if worker_id is not None:
+        stmt = stmt.where(Response.worker_id == worker_id)
+    return stmt
+
+
+def iterResponsesCsv(project_id, worker_id=None):
+    # Genera el CSV por bloques de EXPORT_YIELD_PER filas. yield_per abre un cursor de
+    # servidor (stream_results), así la memoria no depende del tamaño del proyecto.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    result = db.session.execute(
+        _exportQuery(project_id, worker_id).execution_options(yield_per=current_app.config['EXPORT_YIELD_PER'])
+    )
+    try:
+        # La cabecera sale antes de leer la primera fila
+        yield buffer.getvalue()
+        for rows in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                (*row[:-1], row[-1].isoformat() if row[-1] else None) for row in rows
+            )
+            yield buffer.getvalue()
+    finally:
+        result.close()
@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import json
+
+from flask import Response as FlaskResponse, current_app, request
+
+from services.questionCatalog import getDeviceByName
+
+
+def compactResult(result):
+    # Formato compacto del resultado de la importación: el catálogo de preguntas de cada
+    # dispositivo se envía una sola vez y los subjects solo llevan su nombre, en lugar de
+    # repetir todas las preguntas bajo cada subject.
+    devices = {}
+    questions = {}
+    trackers = []
+
+    for tracker in result.get('trackers', []):
+        tracker_name = tracker['tracker_name']
+        device = getDeviceByName(tracker_name)
+        if device and tracker_name not in devices:
+            devices[tracker_name] = {
+                'device_id': device['id'],
+                'question_blocks': [
+                    {
+                        'question_block': block['question_block'],
+                        'question_ids': [q['id'] for q in block['questions']]
+                    } for block in device['question_blocks']
+                ]
+            }
+            for block in device['question_blocks']:
+                for q in block['questions']:
+                    questions[str(q['id'])] = {
+                        'question_text': q['question_text'],
+                        'expected_result': q['expected_result']
+                    }
+
+        trackers.append({
+            'tracker_name': tracker_name,
+            'subjects': [subject['subject'] for subject in tracker.get('subjects', [])]
+        })
+
+    compact = {key: value for key, value in result.items() if key != 'trackers'}
+    compact.update({'format': 'compact', 'devices': devices, 'questions': questions, 'trackers': trackers})
+    return compact
+
+
+def jsonResponse(payload, status=200):
+    # Respuesta JSON con ETag (débil, válida para cualquier codificación) y gzip
+    # cuando el cliente lo acepta y el cuerpo es suficientemente grande
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    response = FlaskResponse(body, status=status, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body).hexdigest(), weak=True)
+    response.vary.add('Accept-Encoding')
+
+    if status == 200:
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if 'gzip' in request.accept_encodings and len(body) >= current_app.config['RESPONSE_GZIP_MIN_SIZE']:
+        response.set_data(gzip.compress(body, compresslevel=current_app.config['RESPONSE_GZIP_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
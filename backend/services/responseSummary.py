@@ -0,0 +1,109 @@
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select
+
+from configs.database import db, upsertInsert
+from configs.models import Device, Project, Response, ResponseSummary, Subtracker, Worker
+
+SUMMARY_KEY = ('project_id', 'device_id', 'subtracker_id', 'worker_id', 'status')
+
+
+def addToSummary(deltas):
+    # deltas: Counter {(project_id, device_id, subtracker_id, worker_id, status): incremento}
+    # Se ejecuta dentro de la transacción de quien escribe las respuestas; el commit lo hace él.
+    # Orden fijo de claves para que dos transacciones concurrentes no se bloqueen mutuamente
+    rows = [
+        dict(zip(SUMMARY_KEY, key), count=count)
+        for key, count in sorted(deltas.items()) if count and key[3] is not None
+    ]
+    if not rows:
+        return
+    stmt = upsertInsert(ResponseSummary).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(SUMMARY_KEY),
+        set_={'count': ResponseSummary.count + stmt.excluded.count}
+    )
+    db.session.execute(stmt)
+
+
+def summaryDeltas(rows):
+    # Cuenta las filas de responses (dicts o Row con las columnas de SUMMARY_KEY)
+    return Counter(tuple(row[column] for column in SUMMARY_KEY) for row in rows)
+
+
+def rebuildSummary(project_id=None):
+    # Recalcula el resumen con un único GROUP BY sobre responses (reparación / carga inicial)
+    source = (
+        select(
+            Response.project_id, Response.device_id, Response.subtracker_id,
+            Response.worker_id, Response.status, func.count()
+        )
+        .where(Response.worker_id.is_not(None))
+        .group_by(*(getattr(Response, column) for column in SUMMARY_KEY))
+    )
+    clear = delete(ResponseSummary)
+    if project_id is not None:
+        source = source.where(Response.project_id == project_id)
+        clear = clear.where(ResponseSummary.project_id == project_id)
+
+    db.session.execute(clear)
+    db.session.execute(insert(ResponseSummary).from_select([*SUMMARY_KEY, 'count'], source))
+    db.session.commit()
+
+
+def _group(rows, key, name):
+    groups = {}
+    for row in rows:
+        entry = groups.setdefault(row[key], {'id': row[key], 'name': row[name], 'total': 0, 'by_status': {}})
+        entry['total'] += row['count']
+        entry['by_status'][row['status']] = entry['by_status'].get(row['status'], 0) + row['count']
+    return list(groups.values())
+
+
+def getProjectProgress(project_id, breakdowns=('device', 'subtracker', 'worker')):
+    # Una sola consulta sobre el resumen (una fila por subtracker/dispositivo/trabajador/estado),
+    # independiente del número de respuestas
+    rows = db.session.execute(
+        select(
+            ResponseSummary.device_id, Device.name.label('device_name'),
+            ResponseSummary.subtracker_id, Subtracker.name.label('subtracker_name'),
+            ResponseSummary.worker_id, Worker.name.label('worker_name'),
+            ResponseSummary.status, ResponseSummary.count
+        )
+        .join(Device, Device.id == ResponseSummary.device_id)
+        .join(Subtracker, Subtracker.id == ResponseSummary.subtracker_id)
+        .join(Worker, Worker.id == ResponseSummary.worker_id)
+        .where(ResponseSummary.project_id == project_id, ResponseSummary.count > 0)
+    ).mappings().all()
+
+    by_status = {}
+    for row in rows:
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['count']
+
+    progress = {'project_id': project_id, 'total': sum(by_status.values()), 'by_status': by_status}
+    if 'device' in breakdowns:
+        progress['devices'] = _group(rows, 'device_id', 'device_name')
+    if 'subtracker' in breakdowns:
+        progress['subtrackers'] = _group(rows, 'subtracker_id', 'subtracker_name')
+    if 'worker' in breakdowns:
+        progress['workers'] = _group(rows, 'worker_id', 'worker_name')
+    return progress
+
+
+def getProjectsProgress():
+    # Totales por proyecto y estado con un GROUP BY sobre el resumen
+    rows = db.session.execute(
+        select(ResponseSummary.project_id, Project.name, ResponseSummary.status, func.sum(ResponseSummary.count))
+        .join(Project, Project.id == ResponseSummary.project_id)
+        .group_by(ResponseSummary.project_id, Project.name, ResponseSummary.status)
+    ).all()
+
+    projects = {}
+    for project_id, project_name, status, count in rows:
+        entry = projects.setdefault(
+            project_id,
+            {'project_id': project_id, 'project_name': project_name, 'total': 0, 'by_status': {}}
+        )
+        entry['total'] += int(count)
+        entry['by_status'][status] = int(count)
+    return list(projects.values())
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import case, select
+
+from configs.database import db, upsertInsert
+from configs.models import SyncState
+
+REDMINE_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# redmine_project_id de la fila que cubre las descargas de todos los proyectos de una URL
+ALL_PROJECTS = 0
+
+
+def parseRedmineDate(value):
+    return datetime.strptime(value, REDMINE_DATE_FORMAT) if value else None
+
+
+def formatRedmineDate(value):
+    return value.strftime(REDMINE_DATE_FORMAT)
+
+
+def getSyncState(redmine_url, worker_id, redmine_project_id=ALL_PROJECTS):
+    if worker_id is None:
+        return None
+    return db.session.execute(
+        select(SyncState).where(
+            SyncState.redmine_url == redmine_url,
+            SyncState.redmine_project_id == redmine_project_id,
+            SyncState.worker_id == worker_id
+        )
+    ).scalar_one_or_none()
+
+
+def getSyncCursor(redmine_url, worker_id, redmine_project_id=None, visible_projects=None):
+    # Cursor desde el que pedir issues, o None para hacer una descarga completa.
+    # Solo hay cursor si esta misma URL, proyecto y trabajador se sincronizó antes:
+    #  - con un proyecto (id numérico), el cursor de ese proyecto;
+    #  - sin proyecto, el de la fila de todos los proyectos, siempre que no haya aparecido
+    #    ningún proyecto nuevo (sus issues pueden ser anteriores al cursor).
+    # Un identificador de texto no se puede asociar a una fila: descarga completa.
+    if redmine_project_id:
+        if not str(redmine_project_id).isdigit():
+            return None
+        state = getSyncState(redmine_url, worker_id, int(redmine_project_id))
+        return state.last_updated_on if state else None
+
+    state = getSyncState(redmine_url, worker_id, ALL_PROJECTS)
+    if state is None or visible_projects is None or state.visible_projects is None:
+        return None
+    if set(visible_projects) - set(state.visible_projects):
+        return None
+    return state.last_updated_on
+
+
+def saveSyncCursor(redmine_url, redmine_project_id, worker_id, last_updated_on, project_id=None,
+                   visible_projects=None):
+    # Se ejecuta dentro de la transacción de la importación; el commit lo hace quien llama.
+    # Nunca se retrocede el cursor si llega una importación más antigua.
+    values = {
+        'redmine_url': redmine_url,
+        'redmine_project_id': redmine_project_id,
+        'worker_id': worker_id,
+        'project_id': project_id,
+        'last_updated_on': last_updated_on,
+        'synced_at': datetime.utcnow()
+    }
+    if visible_projects is not None:
+        values['visible_projects'] = sorted(visible_projects)
+    stmt = upsertInsert(SyncState).values(**values)
+    set_ = {
+        'last_updated_on': case(
+            (stmt.excluded.last_updated_on > SyncState.last_updated_on, stmt.excluded.last_updated_on),
+            else_=SyncState.last_updated_on
+        ),
+        'synced_at': stmt.excluded.synced_at
+    }
+    if project_id is not None:
+        set_['project_id'] = stmt.excluded.project_id
+    if visible_projects is not None:
+        set_['visible_projects'] = stmt.excluded.visible_projects
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['redmine_url', 'redmine_project_id', 'worker_id'],
+        set_=set_
+    ))